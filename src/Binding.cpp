@@ -0,0 +1,101 @@
+#include "utils/InputParser.h"
+#include "utils/Stats.h"
+#include "algorithms/AlgorithmFactory.h"
+#include <cstdint>
+#include <sstream>
+#include <string>
+#include <vector>
+
+using namespace std;
+
+// C API of the shared library loaded by test/native_binding.py, so the algorithms run inside the Python process.
+// The elements are read in place from the arrays of the caller and the results of the last query are kept in
+// the instance until the next query. The memory allocations aren't counted (see MemoryUsage.h) in this library.
+
+typedef long long int T;
+
+struct Instance {
+    GenericAlgorithmInterface<T>* algorithm;
+    Stats stats;
+    QueryResults<T> query_results;
+    vector<int64_t> results;
+    string report;
+};
+
+// Both buffers are reused by all the queries of the instance
+static size_t store_results(Instance* instance) {
+    const QueryResults<T>& results = instance->query_results;
+    instance->results.resize(2 * results.size());
+    for(size_t i = 0; i < results.size(); ++i) {
+        instance->results[2 * i] = results[i].first;
+        instance->results[2 * i + 1] = results[i].second;
+    }
+    return results.size();
+}
+
+extern "C" {
+
+// The arguments are the same as in the command line of the binary (the first one is ignored). Returns nullptr if
+// they are incorrect (e.g. an unknown algorithm or a missing parameter)
+void* create_algorithm_instance(int num_args, char* args[]) {
+    GenericAlgorithmInterface<T>* algorithm;
+    try {
+        InputParser params(num_args, args);
+        algorithm = create_algorithm<T>(params);
+    } catch(const exception&) { // Thrown by InputParser::error or by the conversion of the values of the parameters
+        return nullptr;
+    }
+    Instance* instance = new Instance();
+    instance->algorithm = algorithm;
+    return instance;
+}
+
+void destroy_algorithm_instance(void* handle) {
+    Instance* instance = (Instance*) handle;
+    delete instance->algorithm;
+    delete instance;
+}
+
+void process_elements(void* handle, const int64_t* elements, size_t n) {
+    static_assert(sizeof(T) == sizeof(int64_t), "The binding only supports 64 bit elements");
+    Instance* instance = (Instance*) handle;
+    instance->stats.start_process_elements(n);
+    instance->algorithm->process_elements((const T*) elements, n);
+    instance->stats.end_process_elements();
+}
+
+// The queries return the number of (element, count) pairs stored in query_results
+size_t frequent_query(void* handle, double freq) {
+    Instance* instance = (Instance*) handle;
+    instance->stats.start_frequent_query();
+    instance->query_results.clear();
+    instance->algorithm->frequent_query(freq, instance->query_results);
+    size_t size = store_results(instance);
+    instance->stats.end_frequent_query();
+    return size;
+}
+
+size_t top_k_query(void* handle, int64_t k) {
+    Instance* instance = (Instance*) handle;
+    instance->stats.start_top_k_query();
+    instance->query_results.clear();
+    instance->algorithm->top_k_query(k, instance->query_results);
+    size_t size = store_results(instance);
+    instance->stats.end_top_k_query();
+    return size;
+}
+
+const int64_t* query_results(void* handle) {
+    return ((Instance*) handle)->results.data();
+}
+
+// Same dictionary as the :s command
+const char* get_stats(void* handle) {
+    Instance* instance = (Instance*) handle;
+    ostringstream report;
+    instance->stats.report(report, instance->algorithm);
+    instance->report = report.str();
+    return instance->report.c_str();
+}
+
+}
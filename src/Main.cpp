@@ -1,109 +1,227 @@
 #include "utils/InputParser.h"
 #include "utils/Stats.h"
-#include "algorithms/GenericAlgorithm.h"
-#include "algorithms/lottery_sampling/Algorithm.h"
-#include "algorithms/lottery_sampling_hh/Algorithm.h"
-#include "algorithms/lottery_sampling_v2/Algorithm.h"
-#include "algorithms/lottery_sampling_v2_b/Algorithm.h"
-#include "algorithms/lottery_sampling_v2_c/Algorithm.h"
-#include "algorithms/basic_lottery_sampling/Algorithm.h"
-#include "algorithms/basic_lottery_sampling_hh/Algorithm.h"
-#include "algorithms/basic_lottery_sampling_top_k/Algorithm.h"
-#include "algorithms/lottery_sampling_parallel/Algorithm.h"
-#include "algorithms/space_saving/Algorithm.h"
-#include "algorithms/frequent/Algorithm.h"
-#include "algorithms/lossy_counting/Algorithm.h"
-#include "algorithms/sticky_sampling/Algorithm.h"
-#include "algorithms/count_sketch/Algorithm.h"
-#include "algorithms/freq_obs/Algorithm.h"
+#include "utils/BinaryProtocol.h"
+#include "utils/TraceReader.h"
+#include "utils/Snapshot.h"
+#include "algorithms/AlgorithmFactory.h"
 #include <iostream>
+#include <fstream>
+#include <sstream>
 #include <string>
+#include <vector>
 
 using namespace std;
 
+// Maximum number of elements received through the text protocol that are buffered before processing them
+const size_t BATCH_SIZE = 4096;
+
+// Buffers of the query results, reused by all the queries so answering them doesn't allocate once they have grown
 template<class T>
-GenericAlgorithmInterface<T>* create_algorithm_instance(const InputParser& params) {
-    if(params.get_parameter("-a") == "LotterySampling") {
-        return new LotterySampling::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "LotterySamplingHH") {
-        return new LotterySamplingHH::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "LotterySamplingV2") {
-        return new LotterySamplingV2::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "LotterySamplingV2B") {
-        return new LotterySamplingV2B::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "LotterySamplingV2C") {
-        return new LotterySamplingV2C::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "BasicLotterySampling") {
-        return new BasicLotterySampling::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "BasicLotterySamplingHH") {
-        return new BasicLotterySamplingHH::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "BasicLotterySamplingTopK") {
-        return new BasicLotterySamplingTopK::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "SpaceSaving") {
-        return new SpaceSaving::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "LotterySamplingParallel") {
-        return new LotterySamplingParallel::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "Frequent") {
-        return new Frequent::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "LossyCounting") {
-        return new LossyCounting::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "StickySampling") {
-        return new StickySampling::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "CountSketch") {
-        return new CountSketch::Algorithm<T>(params);
-    } else if(params.get_parameter("-a") == "CountMin") {
-        return new CountSketch::Algorithm<T>(params, true);
-    } else if(params.get_parameter("-a") == "FreqObs") {
-        return new FreqObs::Algorithm<T>(params);
-    } else {
-        params.error();
-        return nullptr;
+struct QueryOutput {
+    QueryResults<T> results;
+    string text;
+    std::vector<int64_t> binary;
+};
+
+// Decimal digits of value at the end of buffer, without the locale and formatting state of the streams
+void append_integer(string& buffer, long long int value) {
+    char digits[20];
+    unsigned long long int magnitude = value < 0 ? 0ULL - (unsigned long long int) value : value;
+    int begin = sizeof(digits);
+    do {
+        digits[--begin] = '0' + magnitude % 10;
+        magnitude /= 10;
+    } while(magnitude > 0);
+    if(value < 0) {
+        buffer.push_back('-');
     }
+    buffer.append(digits + begin, sizeof(digits) - begin);
 }
 
+// One "element frequency" line per result followed by ":end", all of it written at once
 template<class T>
-void print_results(QueryResults<T> results) {
-    for(auto it = results.begin(); it != results.end(); ++it) {
-        cout << it->first << " " << it->second << endl;
+void print_results(QueryOutput<T>& output) {
+    output.text.clear();
+    for(auto it = output.results.begin(); it != output.results.end(); ++it) {
+        append_integer(output.text, it->first);
+        output.text.push_back(' ');
+        append_integer(output.text, it->second);
+        output.text.push_back('\n');
     }
+    output.text.append(":end\n");
+    cout.write(output.text.data(), output.text.size());
+    cout.flush();
 }
 
-int main(int num_args, char* args[]) {
+// A QUERY_RESULTS frame of the binary protocol
+template<class T>
+void write_results(QueryOutput<T>& output) {
+    output.binary.resize(2 * output.results.size());
+    for(size_t i = 0; i < output.results.size(); ++i) {
+        output.binary[2 * i] = output.results[i].first;
+        output.binary[2 * i + 1] = output.results[i].second;
+    }
+    BinaryProtocol::write_frame(BinaryProtocol::QUERY_RESULTS, output.binary.data(), output.binary.size() * sizeof(int64_t));
+}
 
-    InputParser params(num_args, args);
+template<class T>
+void send_results(QueryOutput<T>& output, bool binary_output) {
+    if(binary_output) {
+        write_results(output);
+    } else {
+        print_results(output);
+    }
+}
 
-    typedef long long int T;
-    GenericAlgorithmInterface<T>* algorithm = create_algorithm_instance<T>(params);
+template<class T>
+void process_elements(GenericAlgorithmInterface<T>* algorithm, Stats& stats, const T* elements, size_t n) {
+    stats.start_process_elements(n);
+    algorithm->process_elements(elements, n);
+    stats.end_process_elements();
+}
 
-    Stats stats;
+template<class T>
+void process_trace(GenericAlgorithmInterface<T>* algorithm, Stats& stats, const string& path) {
+    static_assert(sizeof(T) == sizeof(int64_t), "Traces only support 64 bit elements");
+    TraceReader trace(path);
+    std::vector<T> elements(BATCH_SIZE);
+    size_t n;
+    while((n = trace.read((int64_t*) elements.data(), elements.size())) > 0) {
+        process_elements(algorithm, stats, elements.data(), n);
+    }
+}
+
+// Snapshot commands (save, load or merge). The snapshot is written to or read from the file in path
+template<class T>
+void run_snapshot_command(GenericAlgorithmInterface<T>* algorithm, const string& algorithm_name, const string& command, const string& path) {
+    bool done;
+    if(command == "save") {
+        ofstream file(path, ios::binary);
+        Snapshot::write_header(file, algorithm_name);
+        done = file && algorithm->save(file);
+    } else {
+        ifstream file(path, ios::binary);
+        done = Snapshot::read_header(file, algorithm_name) && (command == "load" ? algorithm->load(file) : algorithm->merge(file));
+    }
+    if(!done) {
+        cerr << "Can't " << command << " the snapshot " << path << endl;
+    }
+}
+
+// With binary_output the results of the queries are written as QUERY_RESULTS frames (see BinaryProtocol.h) instead of text
+template<class T>
+void run_text_protocol(GenericAlgorithmInterface<T>* algorithm, Stats& stats, const string& algorithm_name, bool binary_output) {
+    QueryOutput<T> output;
+    std::vector<T> elements;
+    elements.reserve(BATCH_SIZE);
     string s;
     while(cin >> s) {
+        if(s[0] == ':' && !elements.empty()) { // Commands see all the elements received before them
+            process_elements(algorithm, stats, elements.data(), elements.size());
+            elements.clear();
+        }
         if(s == ":q") { // It's a query over the sampled elements
             cin >> s;
+            output.results.clear();
             if(s == ":f") { // Heavy hitters query
                 double freq;
                 cin >> freq;
                 stats.start_frequent_query();
-                print_results(algorithm->frequent_query(freq));
+                algorithm->frequent_query(freq, output.results);
+                send_results(output, binary_output);
                 stats.end_frequent_query();
             } else if(s == ":k") { // k-top frequent elements query
                 int k;
                 cin >> k;
                 stats.start_top_k_query();
-                print_results(algorithm->top_k_query(k));
+                algorithm->top_k_query(k, output.results);
+                send_results(output, binary_output);
                 stats.end_top_k_query();
+            } else {
+                send_results(output, binary_output);
             }
-            cout << ":end" << endl;
         } else if(s == ":s") {
             stats.report(cout, algorithm);
+        } else if(s == ":save" || s == ":load" || s == ":merge") {
+            string path;
+            cin >> path;
+            run_snapshot_command(algorithm, algorithm_name, s.substr(1), path);
         } else { // It's a new element in the data stream
             T element = stoll(s);
 //          T element = s;
-            stats.start_process_element();
-            algorithm->process_element(element);
-            stats.end_process_element();
+            elements.push_back(element);
+            if(elements.size() == BATCH_SIZE) {
+                process_elements(algorithm, stats, elements.data(), elements.size());
+                elements.clear();
+            }
+        }
+    }
+    process_elements(algorithm, stats, elements.data(), elements.size());
+}
+
+template<class T>
+void run_binary_protocol(GenericAlgorithmInterface<T>* algorithm, Stats& stats, const string& algorithm_name) {
+    static_assert(sizeof(T) == sizeof(int64_t), "The binary protocol only supports 64 bit elements");
+    BinaryProtocol::FrameHeader header;
+    QueryOutput<T> output;
+    std::vector<T> elements;
+    while(BinaryProtocol::read_header(header)) {
+        if(header.type == BinaryProtocol::ELEMENTS) { // A chunk of new elements in the data stream
+            elements.resize(header.size / sizeof(T));
+            if(!BinaryProtocol::read_payload(elements.data(), header.size)) {
+                break;
+            }
+            process_elements(algorithm, stats, elements.data(), elements.size());
+        } else if(header.type == BinaryProtocol::FREQUENT_QUERY) { // Heavy hitters query
+            double freq;
+            BinaryProtocol::read_payload(&freq, sizeof(double));
+            stats.start_frequent_query();
+            output.results.clear();
+            algorithm->frequent_query(freq, output.results);
+            write_results(output);
+            stats.end_frequent_query();
+        } else if(header.type == BinaryProtocol::TOP_K_QUERY) { // k-top frequent elements query
+            int64_t k;
+            BinaryProtocol::read_payload(&k, sizeof(int64_t));
+            stats.start_top_k_query();
+            output.results.clear();
+            algorithm->top_k_query(k, output.results);
+            write_results(output);
+            stats.end_top_k_query();
+        } else if(header.type == BinaryProtocol::STATS) {
+            ostringstream report;
+            stats.report(report, algorithm);
+            BinaryProtocol::write_frame(BinaryProtocol::STATS, report.str());
+        } else if(header.type == BinaryProtocol::SAVE || header.type == BinaryProtocol::LOAD || header.type == BinaryProtocol::MERGE) {
+            string path(header.size, '\0');
+            BinaryProtocol::read_payload(&path[0], header.size);
+            string command = header.type == BinaryProtocol::SAVE ? "save" : header.type == BinaryProtocol::LOAD ? "load" : "merge";
+            run_snapshot_command(algorithm, algorithm_name, command, path);
+        } else if(header.type == BinaryProtocol::END) {
+            break;
+        } else {
+            cerr << "Unknown frame type: " << header.type << endl;
+            exit(1);
         }
     }
+}
+
+int main(int num_args, char* args[]) {
+
+    InputParser params(num_args, args);
+
+    typedef long long int T;
+    GenericAlgorithmInterface<T>* algorithm = create_algorithm<T>(params);
+
+    Stats stats;
+    if(params.has_parameter("-input")) { // The stream is read from a binary trace. Afterwards the queries are read from stdin
+        process_trace(algorithm, stats, params.get_parameter("-input"));
+    }
+    if(params.has_parameter("-binary")) {
+        run_binary_protocol(algorithm, stats, params.get_parameter("-a"));
+    } else {
+        run_text_protocol(algorithm, stats, params.get_parameter("-a"), params.has_parameter("-binary_output"));
+    }
 
     delete algorithm;
 
@@ -0,0 +1,78 @@
+#ifndef _AlgorithmFactory_H_
+#define _AlgorithmFactory_H_
+
+#include "algorithms/GenericAlgorithm.h"
+#include "utils/InputParser.h"
+#include "algorithms/lottery_sampling/Algorithm.h"
+#include "algorithms/lottery_sampling_hh/Algorithm.h"
+#include "algorithms/lottery_sampling_v2/Algorithm.h"
+#include "algorithms/lottery_sampling_v2_b/Algorithm.h"
+#include "algorithms/lottery_sampling_v2_c/Algorithm.h"
+#include "algorithms/basic_lottery_sampling/Algorithm.h"
+#include "algorithms/basic_lottery_sampling_hh/Algorithm.h"
+#include "algorithms/basic_lottery_sampling_top_k/Algorithm.h"
+#include "algorithms/lottery_sampling_parallel/Algorithm.h"
+#include "algorithms/space_saving/Algorithm.h"
+#include "algorithms/frequent/Algorithm.h"
+#include "algorithms/lossy_counting/Algorithm.h"
+#include "algorithms/sticky_sampling/Algorithm.h"
+#include "algorithms/count_sketch/Algorithm.h"
+#include "algorithms/freq_obs/Algorithm.h"
+#include "algorithms/sharded/Algorithm.h"
+
+
+template<class T>
+GenericAlgorithmInterface<T>* create_algorithm_instance(const InputParser& params) {
+    if(params.get_parameter("-a") == "LotterySampling") {
+        return new LotterySampling::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "LotterySamplingHH") {
+        return new LotterySamplingHH::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "LotterySamplingV2") {
+        return new LotterySamplingV2::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "LotterySamplingV2B") {
+        return new LotterySamplingV2B::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "LotterySamplingV2C") {
+        return new LotterySamplingV2C::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "BasicLotterySampling") {
+        return new BasicLotterySampling::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "BasicLotterySamplingHH") {
+        return new BasicLotterySamplingHH::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "BasicLotterySamplingTopK") {
+        return new BasicLotterySamplingTopK::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "SpaceSaving") {
+        return new SpaceSaving::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "LotterySamplingParallel") {
+        return new LotterySamplingParallel::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "Frequent") {
+        return new Frequent::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "LossyCounting") {
+        return new LossyCounting::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "StickySampling") {
+        return new StickySampling::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "CountSketch") {
+        return new CountSketch::Algorithm<T>(params);
+    } else if(params.get_parameter("-a") == "CountMin") {
+        return new CountSketch::Algorithm<T>(params, true);
+    } else if(params.get_parameter("-a") == "FreqObs") {
+        return new FreqObs::Algorithm<T>(params);
+    } else {
+        params.error();
+        return nullptr;
+    }
+}
+
+template<class T>
+GenericAlgorithmInterface<T>* create_algorithm(const InputParser& params) {
+    GenericAlgorithmInterface<T>* algorithm;
+    if(params.has_parameter("-threads")) { // One instance per thread, each one processing a partition of the elements
+        algorithm = new Sharded::Algorithm<T>(params, create_algorithm_instance<T>);
+    } else {
+        algorithm = create_algorithm_instance<T>(params);
+    }
+    if(params.has_parameter("-cost_profile")) { // One of every cost_profile elements is profiled
+        algorithm->enable_cost_profile(stoul(params.get_parameter("-cost_profile")));
+    }
+    return algorithm;
+}
+
+#endif //_AlgorithmFactory_H_
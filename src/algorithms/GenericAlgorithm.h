@@ -1,12 +1,17 @@
 #ifndef _GenericAlgorithm_H_
 #define _GenericAlgorithm_H_
 
+#include "data_structures/ElementTable.h"
+#include "utils/Profiler.h"
 #include <unordered_map>
 #include <string>
-#include <list>
+#include <vector>
+#include <cstddef>
+#include <istream>
+#include <ostream>
 
 template<class T>
-using QueryResults = std::list<std::pair<T, unsigned int>>;
+using QueryResults = std::vector<std::pair<T, unsigned int>>;
 
 // This interface is needed so it's possible to create a pointer
 // to a GenericAlgorithm, since GenericAlgorithm is a template class
@@ -16,19 +21,54 @@ class GenericAlgorithmInterface {
 
 public:
 
-    virtual QueryResults<T> frequent_query(double f) = 0;
+    // The queries append their results to the given buffer, so the callers can reuse it between queries
+    virtual void frequent_query(double f, QueryResults<T>& results) = 0;
 
-    virtual QueryResults<T> top_k_query(int k) = 0;
+    virtual void top_k_query(int k, QueryResults<T>& results) = 0;
 
     virtual void process_element(const T& element_id) = 0;
 
+    virtual void process_elements(const T* begin, size_t n) {
+        for(const T* it = begin; it != begin + n; ++it) {
+            process_element(*it);
+        }
+    }
+
     virtual unsigned int sample_size() const = 0;
 
     virtual std::unordered_map<std::string, double> get_custom_stats() {
         return std::unordered_map<std::string, double>();
     }
 
-    virtual ~GenericAlgorithmInterface() {}
+    // Snapshots of the state of the algorithm (see utils/Snapshot.h). merge combines the state of a snapshot
+    // with the current one. They return false if the algorithm doesn't support them or the snapshot is invalid.
+    virtual bool save(std::ostream& stream) { return false; }
+
+    virtual bool load(std::istream& stream) { return false; }
+
+    virtual bool merge(std::istream& stream) { return false; }
+
+    // Built-in cost profiling of one of every sample_period elements (see utils/Profiler.h)
+    virtual void enable_cost_profile(unsigned int sample_period) {
+        delete cost_profile;
+        cost_profile = new Profiler::Profile(sample_period);
+    }
+
+    // Profiles of this instance, reported together by Stats
+    virtual void get_cost_profiles(std::vector<const Profiler::Profile*>& profiles) const {
+        if(cost_profile != nullptr) {
+            profiles.push_back(cost_profile);
+        }
+    }
+
+    virtual ~GenericAlgorithmInterface() {
+        delete cost_profile;
+    }
+
+protected:
+
+    // nullptr unless the profiling is enabled
+    Profiler::Profile* cost_profile = nullptr;
 
 };
 
@@ -38,7 +78,7 @@ class GenericAlgorithm : public GenericAlgorithmInterface<T> {
 
 private:
 
-    typedef std::unordered_map<T, Element<T>> MonitoredElements;
+    typedef ElementTable::ElementTable<T, Element<T>> MonitoredElements;
     MonitoredElements monitored_elements;
     unsigned int m = 0;
 
@@ -56,17 +96,32 @@ protected:
 
     void set_monitored_size(unsigned int m);
 
+    // Used by algorithms which manage the monitored elements by themselves (e.g. to restore a snapshot)
+    void clear_monitored_elements();
+
+    Element<T>* find_element(const T& element_id) const;
+
+    Element<T>& add_element(const T& element_id);
+
+    // Body of process_element. The insert_element and update_element of Algorithm are called
+    // through its static type, so they are resolved at compile time when they are final.
+    template<class Algorithm>
+    void insert_or_update(Algorithm* algorithm, const T& element_id);
+
 public:
 
     int N = 0;
 
     void process_element(const T& element_id) override;
 
+    // Algorithms overriding process_element must override this one too
+    void process_elements(const T* begin, size_t n) override;
+
     unsigned int sample_size() const override;
 
-    virtual QueryResults<T> frequent_query(double f) override;
+    virtual void frequent_query(double f, QueryResults<T>& results) override;
 
-    virtual QueryResults<T> top_k_query(int k) override;
+    virtual void top_k_query(int k, QueryResults<T>& results) override;
 
 };
 
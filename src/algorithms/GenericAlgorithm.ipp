@@ -1,46 +1,64 @@
 #include "algorithms/GenericAlgorithm.h"
+#include <cmath>
 
 template<template<typename> class Element, class T, class FrequencyOrder>
 void GenericAlgorithm<Element, T, FrequencyOrder>::set_monitored_size(unsigned int m) {
-    // TODO experiment with different max_load_factor
-    monitored_elements.max_load_factor(1);
-    monitored_elements.reserve(m);
+    // One more element since a new one is created before deciding which one it replaces
+    monitored_elements.reserve(m + 1);
 }
 
 template<template<typename> class Element, class T, class FrequencyOrder>
 void GenericAlgorithm<Element, T, FrequencyOrder>::process_element(const T& element_id) {
+    insert_or_update(this, element_id);
+}
+
+template<template<typename> class Element, class T, class FrequencyOrder>
+void GenericAlgorithm<Element, T, FrequencyOrder>::process_elements(const T* begin, size_t n) {
+    for(const T* it = begin; it != begin + n; ++it) {
+        insert_or_update(this, *it);
+    }
+}
+
+template<template<typename> class Element, class T, class FrequencyOrder>
+template<class Algorithm>
+void GenericAlgorithm<Element, T, FrequencyOrder>::insert_or_update(Algorithm* algorithm, const T& element_id) {
     ++N;
-    typename MonitoredElements::iterator it = monitored_elements.find(element_id);
-    if(it == monitored_elements.end()) { // element wasn't being sampled
-        it = monitored_elements.emplace(element_id, element_id).first; // Create instance of element
-        if(!insert_element(it->second)) {
-            monitored_elements.erase(it); // Since the algorithm has chosen no to keep it in the sample, we remove it
+    Profiler::ElementScope profiled_element(this->cost_profile);
+    Element<T>* element;
+    {
+        Profiler::Scope scope(Profiler::HASH_LOOKUP);
+        element = monitored_elements.find(element_id);
+    }
+    if(element == nullptr) { // element wasn't being sampled
+        element = monitored_elements.create(element_id); // Create instance of element (taken from the slab, not allocated)
+        bool inserted = algorithm->insert_element(*element);
+        Profiler::Scope scope(Profiler::HASH_LOOKUP);
+        if(!inserted) {
+            monitored_elements.discard(element); // Since the algorithm has chosen no to keep it in the sample, we discard it
         } else {
+            monitored_elements.insert(element);
             ++m;
         }
     } else { // element was being sampled
-        update_element(it->second);
+        algorithm->update_element(*element);
     }
 }
 
 template<template<typename> class Element, class T, class FrequencyOrder>
-QueryResults<T> GenericAlgorithm<Element, T, FrequencyOrder>::frequent_query(double f) {
-    QueryResults<T> results;
-    for(auto it = get_frequency_order().begin(); it != get_frequency_order().end() && (*it)->get_freq() >= ceil(get_frequency_threshold(f) * N); ++it) {
+void GenericAlgorithm<Element, T, FrequencyOrder>::frequent_query(double f, QueryResults<T>& results) {
+    double threshold = ceil(get_frequency_threshold(f) * N);
+    for(auto it = get_frequency_order().begin(); it != get_frequency_order().end() && (*it)->get_freq() >= threshold; ++it) {
         Element<T>* element = *it;
-        results.push_back(std::make_pair(element->id, element->get_freq()));
+        results.emplace_back(element->id, element->get_freq());
     }
-    return results;
 }
 
 template<template<typename> class Element, class T, class FrequencyOrder>
-QueryResults<T> GenericAlgorithm<Element, T, FrequencyOrder>::top_k_query(int k) {
-    QueryResults<T> results;
+void GenericAlgorithm<Element, T, FrequencyOrder>::top_k_query(int k, QueryResults<T>& results) {
     for(auto it = get_frequency_order().begin(); it != get_frequency_order().end() && k-- > 0; ++it) {
         Element<T>* element = *it;
-        results.push_back(std::make_pair(element->id, element->get_freq()));
+        results.emplace_back(element->id, element->get_freq());
     }
-    return results;
 }
 
 template<template<typename> class Element, class T, class FrequencyOrder>
@@ -49,6 +67,25 @@ void GenericAlgorithm<Element, T, FrequencyOrder>::remove_element(const T& eleme
     --m;
 }
 
+template<template<typename> class Element, class T, class FrequencyOrder>
+void GenericAlgorithm<Element, T, FrequencyOrder>::clear_monitored_elements() {
+    monitored_elements.clear();
+    m = 0;
+}
+
+template<template<typename> class Element, class T, class FrequencyOrder>
+Element<T>* GenericAlgorithm<Element, T, FrequencyOrder>::find_element(const T& element_id) const {
+    return monitored_elements.find(element_id);
+}
+
+template<template<typename> class Element, class T, class FrequencyOrder>
+Element<T>& GenericAlgorithm<Element, T, FrequencyOrder>::add_element(const T& element_id) {
+    Element<T>* element = monitored_elements.create(element_id);
+    monitored_elements.insert(element);
+    ++m;
+    return *element;
+}
+
 template<template<typename> class Element, class T, class FrequencyOrder>
 unsigned int GenericAlgorithm<Element, T, FrequencyOrder>::sample_size() const {
     return m;
@@ -17,7 +17,7 @@ Algorithm<T>::Algorithm(const InputParser& parameters) {
     } else {
         seed = -1;
     }
-    ticket_generator = TicketUtils(seed);
+    ticket_generator = TicketUtils(seed, parameters.has_parameter("-fast_rng"));
 }
 
 template<class T>
@@ -45,7 +45,7 @@ public:
 
     unordered_map<string, double> get_custom_stats() override;
 
-    QueryResults<T> top_k_query(int k) override;
+    void top_k_query(int k, QueryResults<T>& results) override;
 };
 
 
@@ -18,7 +18,7 @@ Algorithm<T>::Algorithm(const InputParser& parameters) {
     } else {
         seed = -1;
     }
-    ticket_generator = TicketUtils(seed);
+    ticket_generator = TicketUtils(seed, parameters.has_parameter("-fast_rng"));
 }
 
 template<class T>
@@ -115,9 +115,9 @@ unordered_map<string, double> Algorithm<T>::get_custom_stats() {
 }
 
 template<class T>
-QueryResults<T> Algorithm<T>::top_k_query(int k) {
+void Algorithm<T>::top_k_query(int k, QueryResults<T>& results) {
     double support = sqrt(1 - error) * k_th_freq_obs / this->N;
-    return this->frequent_query(support);
+    this->frequent_query(support, results);
 }
 
 
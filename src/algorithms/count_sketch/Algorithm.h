@@ -3,6 +3,7 @@
 
 #include "algorithms/GenericAlgorithm.h"
 #include "algorithms/count_sketch/Types.h"
+#include "utils/Snapshot.h"
 
 
 namespace CountSketch {
@@ -18,15 +19,49 @@ private:
     unsigned int h;
     unsigned int q;
     Counters counters;
-    Hasher<T> element_hasher;
-    Hasher<size_t> hash_hasher;
     bool count_min;
+    bool conservative_update;
 
-    bool insert_element(Element<T>& element) override;
+    // Position in the counters and sign of an element in a row
+    struct Row {
+        size_t position;
+        int sign;
+    };
 
-    void update_element(Element<T>& element) override;
+    // Number of elements ahead of the current one in process_elements whose rows are computed and prefetched
+    static const size_t PREFETCH_DISTANCE = 8;
 
-    int update_count(Element<T>& element);
+    // Scratch space for the counters of an element, so updates don't allocate memory
+    vector<Row> element_rows;
+    vector<int> element_counts;
+    // Rows of the next PREFETCH_DISTANCE elements in process_elements (h per element). current_rows points to the
+    // ones of the element being processed, or is nullptr when they have to be computed
+    vector<Row> prefetched_rows;
+    const Row* current_rows = nullptr;
+
+    friend class GenericAlgorithm<Element, T, FrequencyOrder<Element<T>>>;
+
+    bool insert_element(Element<T>& element) final;
+
+    void update_element(Element<T>& element) final;
+
+    uint64_t hash_element(const T& element_id) const;
+
+    // The position in the counters and the sign of the element in every row are derived from its hash
+    Row get_row(uint64_t element_hash, unsigned int i) const;
+
+    void get_rows(const T& element_id, Row* rows) const;
+
+    // Same as get_rows, also prefetching the counters of the rows
+    void prefetch_rows(const T& element_id, Row* rows) const;
+
+    int get_estimate();
+
+    int update_count(const T& element_id);
+
+    int estimate_count(const T& element_id);
+
+    bool read_snapshot(istream& stream, bool merge);
 
 public:
 
@@ -34,7 +69,18 @@ public:
 
     Algorithm(const InputParser& parameters, bool count_min);
 
+    void process_elements(const T* begin, size_t n) override;
+
     FrequencyOrder<Element<T>>& get_frequency_order() override;
+
+    bool save(ostream& stream) override;
+
+    bool load(istream& stream) override;
+
+    // The counters of sketches with the same dimensions are added (the hash functions are the same in
+    // every process). The counts of the union of the monitored elements are estimated from the merged
+    // counters and the m highest are kept.
+    bool merge(istream& stream) override;
 };
 
 
@@ -1,5 +1,7 @@
 #include "algorithms/count_sketch/Algorithm.h"
 #include <algorithm>
+#include <limits>
+#include <unordered_set>
 
 
 namespace CountSketch {
@@ -13,7 +15,12 @@ Algorithm<T>::Algorithm(const InputParser& parameters, bool count_min) {
     q = (unsigned int) stoul(parameters.get_parameter("-q"));
     assert(h % 2 == 1);
     this->count_min = count_min;
-    counters = Counters(h, vector<int>(q, 0));
+    // Conservative update (only for CountMin): only the counters below the new estimate are increased
+    conservative_update = count_min && parameters.has_parameter("-conservative");
+    counters = Counters(h * q, 0);
+    element_rows = vector<Row>(h);
+    element_counts = vector<int>(h);
+    prefetched_rows = vector<Row>(PREFETCH_DISTANCE * h);
 }
 
 template<class T>
@@ -22,31 +29,113 @@ FrequencyOrder<Element<T>>& Algorithm<T>::get_frequency_order() {
 }
 
 template<class T>
-int Algorithm<T>::update_count(Element<T>& element) {
-    vector<int> element_counters = vector<int>(h);
-    size_t id_hash = element_hasher(element.id);
-    for(int i = 0; i < h; ++i) {
-        unsigned int index = hash_hasher(id_hash + i) % q;
-        int increment;
-        if(count_min) {
-            increment = 1;
-        } else {
-            increment = hash_hasher(id_hash + h + i) % 2 == 0 ? -1 : 1;
+void Algorithm<T>::process_elements(const T* begin, size_t n) {
+    // The rows of the following elements are computed and their counters prefetched while the current one is
+    // processed. They are kept in a ring buffer, so the update of each element reuses them
+    for(size_t i = 0; i < n && i < PREFETCH_DISTANCE; ++i) {
+        prefetch_rows(begin[i], &prefetched_rows[i * h]);
+    }
+    for(size_t i = 0; i < n; ++i) {
+        Row* rows = &prefetched_rows[(i % PREFETCH_DISTANCE) * h];
+        current_rows = rows;
+        this->insert_or_update(this, begin[i]);
+        if(i + PREFETCH_DISTANCE < n) { // Its slot is reused by the element PREFETCH_DISTANCE positions ahead
+            prefetch_rows(begin[i + PREFETCH_DISTANCE], rows);
         }
-        counters[i][index] += increment;
-        element_counters[i] = counters[i][index];
     }
+    current_rows = nullptr;
+}
+
+template<class T>
+uint64_t Algorithm<T>::hash_element(const T& element_id) const {
+    // Finalizer of MurmurHash3, since std::hash is usually the identity for integers
+    uint64_t x = hash<T>()(element_id);
+    x ^= x >> 33;
+    x *= 0xff51afd7ed558ccdULL;
+    x ^= x >> 33;
+    x *= 0xc4ceb9fe1a85ec53ULL;
+    x ^= x >> 33;
+    return x;
+}
+
+template<class T>
+typename Algorithm<T>::Row Algorithm<T>::get_row(uint64_t element_hash, unsigned int i) const {
+    // Hash of the row (splitmix64 step), its high bits give the column and the lowest one the sign
+    uint64_t x = element_hash + (i + 1) * 0x9e3779b97f4a7c15ULL;
+    x = (x ^ (x >> 30)) * 0xbf58476d1ce4e5b9ULL;
+    x = (x ^ (x >> 27)) * 0x94d049bb133111ebULL;
+    x ^= x >> 31;
+    // The sign is computed without branches, as it's random
+    return {(size_t) i * q + (size_t) (((x >> 32) * q) >> 32), (int) ((x & 1) | count_min) * 2 - 1};
+}
+
+template<class T>
+void Algorithm<T>::get_rows(const T& element_id, Row* rows) const {
+    uint64_t element_hash = hash_element(element_id);
+    for(unsigned int i = 0; i < h; ++i) {
+        rows[i] = get_row(element_hash, i);
+    }
+}
+
+template<class T>
+void Algorithm<T>::prefetch_rows(const T& element_id, Row* rows) const {
+    uint64_t element_hash = hash_element(element_id);
+    for(unsigned int i = 0; i < h; ++i) {
+        rows[i] = get_row(element_hash, i);
+#if defined(__GNUC__)
+        __builtin_prefetch(&counters[rows[i].position], 1);
+#endif
+    }
+}
+
+template<class T>
+int Algorithm<T>::get_estimate() {
     if(count_min) {
-        return *min_element(element_counters.begin(), element_counters.end());
+        return *min_element(element_counts.begin(), element_counts.end());
     } else {
-        nth_element(element_counters.begin(), element_counters.begin() + h/2, element_counters.end());
-        return element_counters[h/2];
+        nth_element(element_counts.begin(), element_counts.begin() + h/2, element_counts.end());
+        return element_counts[h/2];
+    }
+}
+
+template<class T>
+int Algorithm<T>::update_count(const T& element_id) {
+    const Row* rows = current_rows;
+    if(rows == nullptr) {
+        get_rows(element_id, element_rows.data());
+        rows = element_rows.data();
+    }
+    if(conservative_update) {
+        int estimate = numeric_limits<int>::max();
+        for(unsigned int i = 0; i < h; ++i) {
+            estimate = min(estimate, counters[rows[i].position]);
+        }
+        ++estimate;
+        for(unsigned int i = 0; i < h; ++i) {
+            counters[rows[i].position] = max(counters[rows[i].position], estimate);
+        }
+        return estimate;
+    }
+    for(unsigned int i = 0; i < h; ++i) {
+        Row row = rows[i];
+        counters[row.position] += row.sign;
+        element_counts[i] = row.sign * counters[row.position];
+    }
+    return get_estimate();
+}
+
+template<class T>
+int Algorithm<T>::estimate_count(const T& element_id) {
+    get_rows(element_id, element_rows.data());
+    for(unsigned int i = 0; i < h; ++i) {
+        element_counts[i] = element_rows[i].sign * counters[element_rows[i].position];
     }
+    return get_estimate();
 }
 
 template<class T>
 bool Algorithm<T>::insert_element(Element<T>& element) {
-    element.freq = max(1, update_count(element));
+    element.freq = max(1, update_count(element.id));
 
     if(this->sample_size() < m) {
         frequency_order.insert_element(&element);
@@ -66,8 +155,89 @@ bool Algorithm<T>::insert_element(Element<T>& element) {
 template<class T>
 void Algorithm<T>::update_element(Element<T>& element) {
     frequency_order.update_key(&element, &Element<T>::freq, element.freq + 1);
-    update_count(element);
+    update_count(element.id);
 }
 
+template<class T>
+bool Algorithm<T>::save(ostream& stream) {
+    vector<T> ids;
+    vector<int> freqs;
+    for(auto it = frequency_order.begin(); it != frequency_order.end(); ++it) {
+        ids.push_back((*it)->id);
+        freqs.push_back((*it)->freq);
+    }
+    Snapshot::write(stream, this->N);
+    Snapshot::write(stream, h);
+    Snapshot::write(stream, q);
+    Snapshot::write_vector(stream, counters);
+    Snapshot::write_vector(stream, ids);
+    Snapshot::write_vector(stream, freqs);
+    return (bool) stream;
+}
+
+template<class T>
+bool Algorithm<T>::load(istream& stream) {
+    return read_snapshot(stream, false);
+}
 
-}
\ No newline at end of file
+template<class T>
+bool Algorithm<T>::merge(istream& stream) {
+    return read_snapshot(stream, true);
+}
+
+template<class T>
+bool Algorithm<T>::read_snapshot(istream& stream, bool merge) {
+    int N;
+    unsigned int snapshot_h, snapshot_q;
+    if(!Snapshot::read(stream, N) || !Snapshot::read(stream, snapshot_h) || !Snapshot::read(stream, snapshot_q) ||
+            snapshot_h != h || snapshot_q != q) {
+        return false;
+    }
+    Counters snapshot_counters;
+    if(!Snapshot::read_vector(stream, snapshot_counters) || snapshot_counters.size() != counters.size()) {
+        return false;
+    }
+    vector<T> ids;
+    vector<int> freqs;
+    if(!Snapshot::read_vector(stream, ids) || !Snapshot::read_vector(stream, freqs) || ids.size() != freqs.size()) {
+        return false;
+    }
+
+    vector<pair<T, int>> elements;
+    if(merge) {
+        for(size_t i = 0; i < counters.size(); ++i) {
+            counters[i] += snapshot_counters[i];
+        }
+        unordered_set<T> merged_ids(ids.begin(), ids.end());
+        for(auto it = frequency_order.begin(); it != frequency_order.end(); ++it) {
+            merged_ids.insert((*it)->id);
+        }
+        for(auto it = merged_ids.begin(); it != merged_ids.end(); ++it) {
+            elements.emplace_back(*it, max(1, estimate_count(*it)));
+        }
+        N += this->N;
+    } else {
+        counters = snapshot_counters;
+        for(size_t i = 0; i < ids.size(); ++i) {
+            elements.emplace_back(ids[i], freqs[i]);
+        }
+    }
+    stable_sort(elements.begin(), elements.end(), [](const pair<T, int>& a, const pair<T, int>& b) { return a.second > b.second; });
+    if(elements.size() > m) {
+        elements.resize(m);
+    }
+
+    this->clear_monitored_elements();
+    frequency_order = FrequencyOrder<Element<T>>();
+    // Elements with the same frequency are inserted after the existing ones, so the frequency order is restored backwards
+    for(auto it = elements.rbegin(); it != elements.rend(); ++it) {
+        Element<T>& element = this->add_element(it->first);
+        element.freq = it->second;
+        frequency_order.insert_element(&element);
+    }
+    this->N = N;
+    return true;
+}
+
+
+}
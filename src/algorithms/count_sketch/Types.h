@@ -10,7 +10,8 @@ namespace CountSketch {
     
 using namespace std;
 
-using Counters = vector<vector<int>>;
+// Matrix of h rows of q counters, stored one row after the other
+using Counters = vector<int>;
 
 template<class Element>
 using FrequencyOrder = SortedTree::SortedTree<Element, &Element::compare_freq, &Element::frequency_order_locator>;
@@ -41,23 +42,6 @@ struct Element {
 };
 
 
-// TODO improve this (use random hash functions, the hash<int> doesn't work for this)
-template<class T>
-struct Hasher {
-
-    hash<string> hasher;
-
-    size_t operator()(T t) const {
-        return hasher(to_string(t));
-    }
-};
-
-template<>
-size_t Hasher<string>::operator()(string t) const {
-    return hasher(t);
-}
-
-
 }
 
 #endif //_CountSketch_Types_H_
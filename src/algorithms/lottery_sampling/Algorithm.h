@@ -4,6 +4,7 @@
 #include "algorithms/GenericAlgorithm.h"
 #include "algorithms/lottery_sampling/Types.h"
 #include "utils/TicketUtils.h"
+#include "utils/Snapshot.h"
 
 
 namespace LotterySampling {
@@ -24,21 +25,39 @@ private:
     double phi;
     int leading_ones;
 
+    friend class GenericAlgorithm<Element, T, FrequencyOrder<Element<T>>>;
+
     void process_element(const T& element_id) override;
 
-    bool insert_element(Element<T>& element) override;
+    bool insert_element(Element<T>& element) final;
+
+    void update_element(Element<T>& element) final;
 
-    void update_element(Element<T>& element) override;
+    void drop_leading_ones();
+
+    bool read_snapshot(istream& stream, bool merge);
 
 public:
 
     Algorithm(const InputParser& parameters);
 
+    void process_elements(const T* begin, size_t n) override;
+
     FrequencyOrder<Element<T>>& get_frequency_order() override;
 
     double get_frequency_threshold(double f) const override;
 
     unordered_map<string, double> get_custom_stats() override;
+
+    bool save(ostream& stream) override;
+
+    bool load(istream& stream) override;
+
+    // The union of both samples is made, adding the counts and keeping the maximum ticket of the elements
+    // in both (after bringing the tickets to the same scale), and the m elements with highest tickets are kept.
+    // The tickets are the same that a single instance would have drawn, but the counts of the elements which
+    // were not sampled in both instances are underestimated (as it happens when an element is sampled again).
+    bool merge(istream& stream) override;
 };
 
 
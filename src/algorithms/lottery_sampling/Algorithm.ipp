@@ -1,4 +1,6 @@
 #include "algorithms/lottery_sampling/Algorithm.h"
+#include <algorithm>
+#include <tuple>
 
 
 namespace LotterySampling {
@@ -21,7 +23,7 @@ Algorithm<T>::Algorithm(const InputParser& parameters) {
     } else {
         seed = -1;
     }
-    ticket_generator = TicketUtils(seed);
+    ticket_generator = TicketUtils(seed, parameters.has_parameter("-fast_rng"));
 }
 
 template<class T>
@@ -31,19 +33,27 @@ FrequencyOrder<Element<T>>& Algorithm<T>::get_frequency_order() {
 
 template<class T>
 void Algorithm<T>::process_element(const T& element_id) {
-    Ticket old_threshold = this->sample_size() > 0 ? ticket_order.top()->ticket : 0;
+    Ticket old_threshold = this->sample_size() > 0 ? ticket_order.top()->get_ticket(leading_ones) : 0;
 
-    GenericAlgorithm<Element, T, FrequencyOrder<Element<T>>>::process_element(element_id);
+    this->insert_or_update(this, element_id);
 
-    Ticket new_threshold = ticket_order.top()->ticket;
+    Ticket new_threshold = ticket_order.top()->get_ticket(leading_ones);
     if(new_threshold > old_threshold && this->sample_size() == m && phi == -1) {
-        int remaining_leading_ones = TicketUtils::get_leading_ones(new_threshold);
-        if(remaining_leading_ones > 0) {
-            for(auto it = frequency_order.begin(); it != frequency_order.end(); ++it) {
-                TicketUtils::scale_ticket((*it)->ticket, remaining_leading_ones);
-            }
-            leading_ones += remaining_leading_ones;
-        }
+        drop_leading_ones();
+    }
+}
+
+template<class T>
+void Algorithm<T>::drop_leading_ones() {
+    // All the tickets have at least the leading ones of the threshold, so they are dropped to keep precision.
+    // The tickets aren't rescaled here, they are shifted when they are read (see Element::get_ticket)
+    leading_ones += TicketUtils::get_leading_ones(ticket_order.top()->get_ticket(leading_ones));
+}
+
+template<class T>
+void Algorithm<T>::process_elements(const T* begin, size_t n) {
+    for(const T* it = begin; it != begin + n; ++it) {
+        Algorithm<T>::process_element(*it);
     }
 }
 
@@ -51,6 +61,7 @@ template<class T>
 bool Algorithm<T>::insert_element(Element<T>& element) {
     pair<bool, Token> scaled_token = ticket_generator.generate_token(leading_ones);
     element.ticket = scaled_token.second;
+    element.epoch = leading_ones;
 
     if(this->sample_size() < m) {
         assert(scaled_token.first);
@@ -59,7 +70,7 @@ bool Algorithm<T>::insert_element(Element<T>& element) {
     } else { // Max number of monitored elements is reached. This new one may replace the one with less hits
         Ticket threshold;
         if(phi == -1) {
-            threshold = ticket_order.top()->ticket;
+            threshold = ticket_order.top()->get_ticket(leading_ones);
         } else {
             assert(scaled_token.first);
             threshold = TicketUtils::estimate_ticket(floor(phi * this->N));
@@ -82,8 +93,9 @@ template<class T>
 void Algorithm<T>::update_element(Element<T>& element) {
     frequency_order.increase_key(&element);
     pair<bool, Token> scaled_token = ticket_generator.generate_token(leading_ones);
-    if(scaled_token.first && scaled_token.second > element.ticket) {
+    if(scaled_token.first && scaled_token.second > element.get_ticket(leading_ones)) {
         element.ticket = scaled_token.second;
+        element.epoch = leading_ones;
         ticket_order.key_updated(&element);
     }
 }
@@ -100,12 +112,117 @@ template<class T>
 unordered_map<string, double> Algorithm<T>::get_custom_stats() {
     unordered_map<string, double> stats;
     if(phi == -1) {
-        stats["threshold"] = this->sample_size() > 0 ? TicketUtils::normalize_ticket(ticket_order.top()->ticket) : 0;
+        stats["threshold"] = this->sample_size() > 0 ? TicketUtils::normalize_ticket(ticket_order.top()->get_ticket(leading_ones)) : 0;
     } else {
         stats["threshold"] = TicketUtils::normalize_ticket(TicketUtils::estimate_ticket(floor(phi * this->N)));
     }
     return stats;
 }
 
+template<class T>
+bool Algorithm<T>::save(ostream& stream) {
+    vector<T> ids;
+    vector<unsigned int> counts;
+    vector<Ticket> tickets;
+    for(auto it = frequency_order.begin(); it != frequency_order.end(); ++it) {
+        ids.push_back((*it)->id);
+        counts.push_back((*it)->get_freq());
+        tickets.push_back((*it)->get_ticket(leading_ones));
+    }
+    Snapshot::write(stream, this->N);
+    Snapshot::write(stream, leading_ones);
+    Snapshot::write_vector(stream, ids);
+    Snapshot::write_vector(stream, counts);
+    Snapshot::write_vector(stream, tickets);
+    ticket_generator.save(stream);
+    return (bool) stream;
+}
+
+template<class T>
+bool Algorithm<T>::load(istream& stream) {
+    return read_snapshot(stream, false);
+}
+
+template<class T>
+bool Algorithm<T>::merge(istream& stream) {
+    return read_snapshot(stream, true);
+}
+
+template<class T>
+bool Algorithm<T>::read_snapshot(istream& stream, bool merge) {
+    int N;
+    int snapshot_leading_ones;
+    vector<T> ids;
+    vector<unsigned int> counts;
+    vector<Ticket> tickets;
+    TicketUtils snapshot_ticket_generator;
+    if(!Snapshot::read(stream, N) || !Snapshot::read(stream, snapshot_leading_ones) || !Snapshot::read_vector(stream, ids) ||
+            !Snapshot::read_vector(stream, counts) || !Snapshot::read_vector(stream, tickets) ||
+            ids.size() != counts.size() || ids.size() != tickets.size() || !snapshot_ticket_generator.load(stream)) {
+        return false;
+    }
+
+    // Tickets are scaled to the largest number of dropped leading ones. A ticket without enough leading ones
+    // is lower than any ticket in that scale, so it becomes 0
+    int merged_leading_ones = merge ? max(leading_ones, snapshot_leading_ones) : snapshot_leading_ones;
+    auto rescale = [](Ticket ticket, int offset) {
+        if(offset > 0) {
+            if(TicketUtils::get_leading_ones(ticket) < offset) {
+                return Ticket(0);
+            }
+            TicketUtils::scale_ticket(ticket, offset);
+        }
+        return ticket;
+    };
+
+    // The elements are kept in the order of the frequency order, so loading a snapshot restores it exactly
+    vector<tuple<T, unsigned int, Ticket>> elements;
+    if(merge) {
+        unordered_map<T, size_t> positions;
+        for(auto it = frequency_order.begin(); it != frequency_order.end(); ++it) {
+            positions[(*it)->id] = elements.size();
+            elements.emplace_back((*it)->id, (*it)->get_freq(), rescale((*it)->get_ticket(leading_ones), merged_leading_ones - leading_ones));
+        }
+        for(size_t i = 0; i < ids.size(); ++i) {
+            Ticket ticket = rescale(tickets[i], merged_leading_ones - snapshot_leading_ones);
+            auto position = positions.find(ids[i]);
+            if(position != positions.end()) {
+                get<1>(elements[position->second]) += counts[i];
+                get<2>(elements[position->second]) = max(get<2>(elements[position->second]), ticket);
+            } else {
+                elements.emplace_back(ids[i], counts[i], ticket);
+            }
+        }
+        N += this->N;
+    } else {
+        for(size_t i = 0; i < ids.size(); ++i) {
+            elements.emplace_back(ids[i], counts[i], tickets[i]);
+        }
+        ticket_generator = snapshot_ticket_generator;
+    }
+    if(elements.size() > m) {
+        stable_sort(elements.begin(), elements.end(), [](const tuple<T, unsigned int, Ticket>& a, const tuple<T, unsigned int, Ticket>& b) { return get<2>(a) > get<2>(b); });
+        elements.resize(m);
+    }
+    stable_sort(elements.begin(), elements.end(), [](const tuple<T, unsigned int, Ticket>& a, const tuple<T, unsigned int, Ticket>& b) { return get<1>(a) > get<1>(b); });
+
+    this->clear_monitored_elements();
+    frequency_order = FrequencyOrder<Element<T>>();
+    ticket_order = TicketOrder<Element<T>>(m);
+    for(auto it = elements.begin(); it != elements.end(); ++it) {
+        Element<T>& element = this->add_element(get<0>(*it));
+        element.ticket = get<2>(*it);
+        element.epoch = merged_leading_ones;
+        frequency_order.push_back(&element, get<1>(*it));
+        ticket_order.push(&element);
+    }
+    leading_ones = merged_leading_ones;
+    this->N = N;
+    if(merge && this->sample_size() == m && phi == -1) {
+        drop_leading_ones();
+    }
+    return true;
+}
+
 
-}
\ No newline at end of file
+}
@@ -4,6 +4,7 @@
 #include "data_structures/BinaryHeap.h"
 #include "data_structures/SortedVector.h"
 #include "utils/TicketUtils.h"
+#include <algorithm>
 
 
 namespace LotterySampling {
@@ -26,6 +27,7 @@ struct Element {
 
     T id;
     Ticket ticket;
+    int epoch; // Leading ones dropped from the tickets when ticket was set
 
     Element(const T& id) {
         this->id = id;
@@ -35,8 +37,16 @@ struct Element {
         return frequency_order_locator.bucket_iterator->key;
     }
 
+    // The ticket after dropping leading_ones (>= epoch) leading ones. The ticket of a sampled element
+    // always has the leading ones dropped since its epoch, so shifting them out is exact.
+    Ticket get_ticket(int leading_ones) const {
+        int offset = leading_ones - epoch;
+        return offset == 0 ? ticket : offset >= 64 ? 0 : ticket << offset;
+    }
+
     bool compare_ticket(const Element<T>& element) const {
-        return this->ticket < element.ticket;
+        int leading_ones = std::max(this->epoch, element.epoch);
+        return this->get_ticket(leading_ones) < element.get_ticket(leading_ones);
     }
 
     FrequencyOrderLocator<Element<T>> frequency_order_locator;
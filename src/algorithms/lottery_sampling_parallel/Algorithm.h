@@ -4,6 +4,7 @@
 #include "algorithms/GenericAlgorithm.h"
 #include "algorithms/lottery_sampling_parallel/Types.h"
 #include "utils/TicketUtils.h"
+#include "utils/WorkerPool.h"
 
 
 namespace LotterySamplingParallel {
@@ -18,17 +19,42 @@ private:
 
     FrequencyOrder<Element<T>> frequency_order;
     vector<TicketOrder<ElementInstance<T>>> instances;
-    TicketUtils ticket_generator;
+    vector<TicketUtils> ticket_generators; // One per instance, so the instances can be processed independently
+    InstancePool<T> instance_pool;
     unsigned int m;
 
+    // With -workers, the instances are split among a pool of workers which process batches of elements.
+    // Each worker logs, for every position of the batch, in how many of its instances the element was
+    // inserted and which elements it replaced. Then those events are replayed in order to update the
+    // frequency order and the monitored elements exactly as if the elements were processed one by one.
+    struct Replacement {
+        size_t position;
+        Element<T>* element;
+    };
+
+    WorkerPool* workers = nullptr;
+    vector<Element<T>*> batch;
+    vector<vector<unsigned int>> insertions;
+    vector<vector<Replacement>> replacements;
+
     bool insert_element(Element<T>& element) override;
 
     void update_element(Element<T>& element) override;
 
+    // Updates the sample of instance i with a new occurrence of element. Returns the element replaced in
+    // that instance (nullptr if there isn't one). inserted is set if element enters the sample of instance i.
+    Element<T>* update_instance(unsigned int i, Element<T>& element, bool& inserted);
+
+    void process_batch(const T* begin, size_t n);
+
 public:
 
     Algorithm(const InputParser& parameters);
 
+    ~Algorithm();
+
+    void process_elements(const T* begin, size_t n) override;
+
     FrequencyOrder<Element<T>>& get_frequency_order() override;
 };
 
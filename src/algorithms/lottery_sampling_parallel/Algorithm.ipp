@@ -8,14 +8,28 @@ template<class T>
 Algorithm<T>::Algorithm(const InputParser& parameters) {
     m = (unsigned int) stoul(parameters.get_parameter("-m"));
     unsigned int h = (unsigned int) stoul(parameters.get_parameter("-h"));
-    instances = vector<TicketOrder<ElementInstance<T>>>(h);
+    instances = vector<TicketOrder<ElementInstance<T>>>(h, TicketOrder<ElementInstance<T>>(m));
+    instance_pool = InstancePool<T>(h);
     int seed;
     if(parameters.has_parameter("-seed")) {
         seed = stoi(parameters.get_parameter("-seed"));
     } else {
         seed = -1;
     }
-    ticket_generator = TicketUtils(seed);
+    for(unsigned int i = 0; i < h; ++i) {
+        ticket_generators.push_back(TicketUtils(seed == -1 ? -1 : seed + i, parameters.has_parameter("-fast_rng")));
+    }
+    if(parameters.has_parameter("-workers")) {
+        unsigned int workers_count = min(h, (unsigned int) stoul(parameters.get_parameter("-workers")));
+        workers = new WorkerPool(max(1u, workers_count));
+        insertions.resize(workers->size());
+        replacements.resize(workers->size());
+    }
+}
+
+template<class T>
+Algorithm<T>::~Algorithm() {
+    delete workers;
 }
 
 template<class T>
@@ -26,14 +40,16 @@ FrequencyOrder<Element<T>>& Algorithm<T>::get_frequency_order() {
 template<class T>
 bool Algorithm<T>::insert_element(Element<T>& element) {
     element.freq = 0;
+    element.instances = instance_pool.allocate();
 
     frequency_order.insert_element(&element);
 
     update_element(element);
 
-    bool some_instance_inserted = !element.instances.empty();
+    bool some_instance_inserted = element.sampled_instances > 0;
     if(!some_instance_inserted) {
         frequency_order.remove_element(&element);
+        instance_pool.release(element.instances);
     }
     return some_instance_inserted;
 }
@@ -42,36 +58,130 @@ template<class T>
 void Algorithm<T>::update_element(Element<T>& element) {
     frequency_order.update_key(&element, &Element<T>::freq, element.freq + 1);
 
-    for(int i = 0; i < instances.size(); ++i) {
-
-        Token token = ticket_generator.generate_token();
-
-        if(element.instances.count(i) == 0) { // element wasn't sampled in instance i
-
-            bool is_inserted = instances[i].size() < m or instances[i].top()->ticket < token;
-            if(is_inserted) {
-                ElementInstance<T>& element_instance = element.instances.emplace(i, ElementInstance<T>(&element, token)).first->second;
-                if(instances[i].size() < m) {
-                    instances[i].push(&element_instance);
-                } else {
-                    ElementInstance<T>* replaced_element_instance = instances[i].pop_and_push(&element_instance);
-                    Element<T>& replaced_element = *replaced_element_instance->element;
-                    // We keep the mean ticket of the replaced_element as it is intentionally
-                    replaced_element.instances.erase(i);
-                    if(replaced_element.instances.empty()) {
-                        frequency_order.remove_element(&replaced_element);
-                        this->remove_element(replaced_element.id);
-                    }
-                }
+    for(unsigned int i = 0; i < instances.size(); ++i) {
+        bool inserted;
+        Element<T>* replaced_element = update_instance(i, element, inserted);
+        element.sampled_instances += inserted;
+        if(replaced_element != nullptr && --replaced_element->sampled_instances == 0) {
+            frequency_order.remove_element(replaced_element);
+            instance_pool.release(replaced_element->instances);
+            this->remove_element(replaced_element->id);
+        }
+    }
+}
+
+template<class T>
+Element<T>* Algorithm<T>::update_instance(unsigned int i, Element<T>& element, bool& inserted) {
+    Token token = ticket_generators[i].generate_token();
+    ElementInstance<T>& element_instance = element.instances[i];
+    inserted = false;
+
+    if(element_instance.element == nullptr) { // element wasn't sampled in instance i
+        bool is_inserted = instances[i].size() < m or instances[i].top()->ticket < token;
+        if(is_inserted) {
+            inserted = true;
+            element_instance.element = &element;
+            element_instance.ticket = token;
+            if(instances[i].size() < m) {
+                instances[i].push(&element_instance);
+            } else {
+                ElementInstance<T>* replaced_element_instance = instances[i].pop_and_push(&element_instance);
+                Element<T>* replaced_element = replaced_element_instance->element;
+                // We keep the mean ticket of the replaced_element as it is intentionally
+                replaced_element_instance->element = nullptr;
+                return replaced_element;
             }
+        }
+    } else if(element_instance.ticket < token) { // element was being sampled in instance i
+        element_instance.ticket = token;
+        instances[i].key_updated(&element_instance);
+    }
+    return nullptr;
+}
+
+template<class T>
+void Algorithm<T>::process_elements(const T* begin, size_t n) {
+    if(workers == nullptr) {
+        GenericAlgorithm<Element, T, FrequencyOrder<Element<T>>>::process_elements(begin, n);
+    } else {
+        process_batch(begin, n);
+    }
+}
 
-        } else { // element was being sampled in instance i
-            ElementInstance<T>& element_instance = element.instances.find(i)->second;
-            if(element_instance.ticket < token) {
-                element_instance.ticket = token;
-                instances[i].key_updated(&element_instance);
+template<class T>
+void Algorithm<T>::process_batch(const T* begin, size_t n) {
+    // The elements of the batch are found or created. The ones which are replaced from every instance
+    // are kept until the end of the batch, since they may appear again in it
+    batch.resize(n);
+    for(size_t p = 0; p < n; ++p) {
+        Element<T>* element = this->find_element(begin[p]);
+        if(element == nullptr) {
+            element = &this->add_element(begin[p]);
+            element->instances = instance_pool.allocate();
+        }
+        batch[p] = element;
+    }
+    this->N += n;
+
+    workers->run([this](unsigned int worker) {
+        unsigned int first = instances.size() * worker / workers->size();
+        unsigned int last = instances.size() * (worker + 1) / workers->size();
+        insertions[worker].assign(batch.size(), 0);
+        replacements[worker].clear();
+        for(size_t p = 0; p < batch.size(); ++p) {
+            for(unsigned int i = first; i < last; ++i) {
+                bool inserted;
+                Element<T>* replaced_element = update_instance(i, *batch[p], inserted);
+                insertions[worker][p] += inserted;
+                if(replaced_element != nullptr) {
+                    replacements[worker].push_back({p, replaced_element});
+                }
             }
         }
+    });
+
+    // Replay in the same order as update_element (workers have consecutive instances)
+    vector<size_t> next_replacement(workers->size(), 0);
+    for(size_t p = 0; p < n; ++p) {
+        Element<T>& element = *batch[p];
+        if(element.sampled_instances == 0) { // It's a new element (or all its instances were replaced)
+            element.freq = 0;
+            frequency_order.insert_element(&element);
+        }
+        frequency_order.update_key(&element, &Element<T>::freq, element.freq + 1);
+        for(unsigned int worker = 0; worker < workers->size(); ++worker) {
+            element.sampled_instances += insertions[worker][p];
+            vector<Replacement>& worker_replacements = replacements[worker];
+            for(size_t& r = next_replacement[worker]; r < worker_replacements.size() && worker_replacements[r].position == p; ++r) {
+                if(--worker_replacements[r].element->sampled_instances == 0) {
+                    frequency_order.remove_element(worker_replacements[r].element);
+                }
+            }
+        }
+        if(element.sampled_instances == 0) {
+            frequency_order.remove_element(&element);
+        }
+    }
+
+    // Elements which aren't in any instance at the end of the batch are removed
+    vector<T> removed_ids;
+    auto release = [&](Element<T>* element) {
+        if(element->sampled_instances == 0 && element->instances != nullptr) {
+            instance_pool.release(element->instances);
+            element->instances = nullptr;
+            removed_ids.push_back(element->id);
+        }
+    };
+    for(auto it = batch.begin(); it != batch.end(); ++it) {
+        release(*it);
+    }
+    for(auto worker_replacements = replacements.begin(); worker_replacements != replacements.end(); ++worker_replacements) {
+        for(auto it = worker_replacements->begin(); it != worker_replacements->end(); ++it) {
+            release(it->element);
+        }
+    }
+    for(auto it = removed_ids.begin(); it != removed_ids.end(); ++it) {
+        this->remove_element(*it);
     }
 }
 
@@ -1,7 +1,9 @@
 #ifndef _LotterySamplingParallel_Types_H_
 #define _LotterySamplingParallel_Types_H_
 
-#include <unordered_map>
+#include <vector>
+#include <memory>
+#include <algorithm>
 #include "data_structures/BinaryHeap.h"
 #include "data_structures/SortedTree.h"
 #include "utils/TicketUtils.h"
@@ -27,15 +29,12 @@ using TicketOrderLocator = BinaryHeap::Locator;
 template<class T>
 struct Element {
 
+    // Sample of the element in one of the instances. Each element has one per instance (in a contiguous
+    // block of the InstancePool), the ones with a null element aren't in the sample of their instance.
     struct ElementInstance {
-        Element<T>* element;
+        Element<T>* element = nullptr;
         Ticket ticket;
 
-        ElementInstance(Element<T>* element, const Ticket& ticket) {
-            this->element = element;
-            this->ticket = ticket;
-        }
-
         bool compare_ticket(const ElementInstance& element_instance) const {
             return this->ticket < element_instance.ticket;
         }
@@ -45,7 +44,8 @@ struct Element {
 
     T id;
     unsigned int freq;
-    unordered_map<int, ElementInstance> instances;
+    ElementInstance* instances = nullptr;
+    unsigned int sampled_instances = 0;
 
     Element(const T& id) {
         this->id = id;
@@ -66,6 +66,46 @@ template<class T>
 using ElementInstance = typename Element<T>::ElementInstance;
 
 
+// Blocks of h ElementInstances (one per instance) for the elements. Their addresses are stable
+// since the instance heaps point to them.
+template<class T>
+class InstancePool {
+
+private:
+
+    unsigned int h;
+    vector<unique_ptr<ElementInstance<T>[]>> blocks;
+    vector<ElementInstance<T>*> free_blocks;
+    size_t allocated = 0;
+
+public:
+
+    InstancePool() {}
+
+    InstancePool(unsigned int h) {
+        this->h = h;
+    }
+
+    ElementInstance<T>* allocate() {
+        if(free_blocks.empty()) {
+            size_t size = max<size_t>(64, allocated);
+            blocks.emplace_back(new ElementInstance<T>[size * h]);
+            for(size_t i = size; i > 0; --i) {
+                free_blocks.push_back(&blocks.back()[(i - 1) * h]);
+            }
+            allocated += size;
+        }
+        ElementInstance<T>* instances = free_blocks.back();
+        free_blocks.pop_back();
+        return instances;
+    }
+
+    void release(ElementInstance<T>* instances) {
+        free_blocks.push_back(instances);
+    }
+};
+
+
 }
 
 #endif //_LotterySamplingParallel_Types_H_
@@ -0,0 +1,91 @@
+#ifndef _Sharded_Algorithm_H_
+#define _Sharded_Algorithm_H_
+
+#include "algorithms/GenericAlgorithm.h"
+#include "utils/InputParser.h"
+#include "utils/Snapshot.h"
+#include "utils/WorkerPool.h"
+#include <vector>
+#include <functional>
+
+
+namespace Sharded {
+
+
+using namespace std;
+
+// Runs one instance of an algorithm per thread (-threads). The elements are hash-partitioned among the
+// instances (shards), so every id is always processed by the same shard and each one summarizes a disjoint
+// substream. Each shard receives the same parameters (so the total memory is -threads times the one of a
+// single instance), except -seed, which is incremented for each shard.
+//
+// Merging the summaries:
+// - top_k_query: as the shards monitor disjoint ids, the global top-k elements are among the top-k of every
+//   shard. The merge keeps the k most frequent elements of the union, so it adds no error of its own.
+// - frequent_query: an element with frequency f in the whole stream of length N has frequency f * N / N_i in
+//   the substream of length N_i of its shard, so each shard is queried with that frequency and the results
+//   are joined.
+//
+// Accuracy: the shards see shorter streams, so their guarantees (which depend on N_i and m) hold for each
+// substream. With a balanced partition N_i ~ N / threads, thus with the same m per shard the errors are
+// bounded more tightly than with a single instance, and with m / threads per shard (the same total memory)
+// bounds of the form N / m are kept. A skewed partition (some very frequent ids hashed to the same shard)
+// makes that shard see a larger share of the stream and limits the speedup, not the correctness of the merge.
+template<class T>
+class Algorithm : public GenericAlgorithmInterface<T> {
+
+private:
+
+    vector<GenericAlgorithmInterface<T>*> shards;
+    vector<vector<T>> batches;
+    vector<long long int> shard_N;
+    long long int N = 0;
+
+    WorkerPool* workers;
+
+    unsigned int get_shard(const T& element_id) const;
+
+    // Sorts the results of the shards appended from position begin and keeps the k most frequent ones (k < 0 keeps all)
+    void merge(QueryResults<T>& results, size_t begin, int k) const;
+
+    bool read_snapshot(istream& stream, bool merge);
+
+public:
+
+    Algorithm(const InputParser& parameters, function<GenericAlgorithmInterface<T>*(const InputParser&)> create_instance);
+
+    ~Algorithm();
+
+    void frequent_query(double f, QueryResults<T>& results) override;
+
+    void top_k_query(int k, QueryResults<T>& results) override;
+
+    void process_element(const T& element_id) override;
+
+    void process_elements(const T* begin, size_t n) override;
+
+    unsigned int sample_size() const override;
+
+    unordered_map<string, double> get_custom_stats() override;
+
+    // Every shard has its own profile, as they are processed concurrently
+    void enable_cost_profile(unsigned int sample_period) override;
+
+    void get_cost_profiles(vector<const Profiler::Profile*>& profiles) const override;
+
+    // Snapshots contain the ones of every shard. Since the partition of the ids is always the same,
+    // snapshots with the same number of threads can be merged shard by shard.
+    bool save(ostream& stream) override;
+
+    bool load(istream& stream) override;
+
+    bool merge(istream& stream) override;
+
+};
+
+
+}
+
+#include "algorithms/sharded/Algorithm.ipp"
+
+#endif //_Sharded_Algorithm_H_
@@ -0,0 +1,186 @@
+#include "algorithms/sharded/Algorithm.h"
+#include <algorithm>
+#include <cstdint>
+#include <string>
+
+
+namespace Sharded {
+
+
+template<class T>
+Algorithm<T>::Algorithm(const InputParser& parameters, function<GenericAlgorithmInterface<T>*(const InputParser&)> create_instance) {
+    unsigned int threads = (unsigned int) stoul(parameters.get_parameter("-threads"));
+    if(threads == 0) {
+        parameters.error();
+    }
+    for(unsigned int i = 0; i < threads; ++i) {
+        InputParser shard_parameters = parameters;
+        if(parameters.has_parameter("-seed")) {
+            shard_parameters.set_parameter("-seed", to_string(stoi(parameters.get_parameter("-seed")) + i));
+        }
+        shards.push_back(create_instance(shard_parameters));
+    }
+    batches.resize(threads);
+    shard_N.resize(threads, 0);
+    workers = new WorkerPool(threads);
+}
+
+template<class T>
+Algorithm<T>::~Algorithm() {
+    delete workers;
+    for(auto it = shards.begin(); it != shards.end(); ++it) {
+        delete *it;
+    }
+}
+
+template<class T>
+unsigned int Algorithm<T>::get_shard(const T& element_id) const {
+    // Multiplicative hashing taking the high bits, so the shard is independent of the
+    // low bits of the hash used by the element tables inside the shards
+    uint64_t h = hash<T>()(element_id) * 0x9e3779b97f4a7c15ULL;
+    return (unsigned int) (((h >> 32) * shards.size()) >> 32);
+}
+
+template<class T>
+void Algorithm<T>::process_element(const T& element_id) {
+    unsigned int shard = get_shard(element_id);
+    ++N;
+    ++shard_N[shard];
+    shards[shard]->process_element(element_id);
+}
+
+template<class T>
+void Algorithm<T>::process_elements(const T* begin, size_t n) {
+    for(auto it = batches.begin(); it != batches.end(); ++it) {
+        it->clear();
+    }
+    for(const T* it = begin; it != begin + n; ++it) {
+        batches[get_shard(*it)].push_back(*it);
+    }
+    N += n;
+    for(unsigned int i = 0; i < shards.size(); ++i) {
+        shard_N[i] += batches[i].size();
+    }
+
+    // Every shard processes its batch in its own worker. It returns once all have finished, so the queries always see the whole stream
+    workers->run([this](unsigned int shard) {
+        shards[shard]->process_elements(batches[shard].data(), batches[shard].size());
+    });
+}
+
+template<class T>
+void Algorithm<T>::merge(QueryResults<T>& results, size_t begin, int k) const {
+    // Stable, so the ties keep the order of the shards
+    stable_sort(results.begin() + begin, results.end(), [](const pair<T, unsigned int>& a, const pair<T, unsigned int>& b) { return a.second > b.second; });
+    if(k >= 0 && results.size() - begin > (size_t) k) {
+        results.resize(begin + k);
+    }
+}
+
+template<class T>
+void Algorithm<T>::frequent_query(double f, QueryResults<T>& results) {
+    size_t begin = results.size();
+    for(unsigned int i = 0; i < shards.size(); ++i) {
+        if(shard_N[i] > 0) {
+            shards[i]->frequent_query(f * N / shard_N[i], results);
+        }
+    }
+    merge(results, begin, -1);
+}
+
+template<class T>
+void Algorithm<T>::top_k_query(int k, QueryResults<T>& results) {
+    size_t begin = results.size();
+    for(auto it = shards.begin(); it != shards.end(); ++it) {
+        (*it)->top_k_query(k, results);
+    }
+    merge(results, begin, k);
+}
+
+template<class T>
+unsigned int Algorithm<T>::sample_size() const {
+    unsigned int size = 0;
+    for(auto it = shards.begin(); it != shards.end(); ++it) {
+        size += (*it)->sample_size();
+    }
+    return size;
+}
+
+template<class T>
+unordered_map<string, double> Algorithm<T>::get_custom_stats() {
+    // The custom stats are values of each summary (e.g. the threshold of its sample), which can't be added up.
+    // They are reported for every shard and as the minimum and maximum among the shards
+    unordered_map<string, double> stats;
+    for(unsigned int i = 0; i < shards.size(); ++i) {
+        unordered_map<string, double> shard_stats = shards[i]->get_custom_stats();
+        for(auto stat = shard_stats.begin(); stat != shard_stats.end(); ++stat) {
+            stats[stat->first + "_shard_" + to_string(i)] = stat->second;
+            auto lowest = stats.emplace(stat->first + "_min", stat->second).first;
+            auto highest = stats.emplace(stat->first + "_max", stat->second).first;
+            lowest->second = std::min(lowest->second, stat->second);
+            highest->second = std::max(highest->second, stat->second);
+        }
+    }
+    stats["threads"] = shards.size();
+    return stats;
+}
+
+template<class T>
+void Algorithm<T>::enable_cost_profile(unsigned int sample_period) {
+    for(auto it = shards.begin(); it != shards.end(); ++it) {
+        (*it)->enable_cost_profile(sample_period);
+    }
+}
+
+template<class T>
+void Algorithm<T>::get_cost_profiles(vector<const Profiler::Profile*>& profiles) const {
+    for(auto it = shards.begin(); it != shards.end(); ++it) {
+        (*it)->get_cost_profiles(profiles);
+    }
+}
+
+template<class T>
+bool Algorithm<T>::save(ostream& stream) {
+    Snapshot::write(stream, (uint32_t) shards.size());
+    Snapshot::write_vector(stream, shard_N);
+    for(auto it = shards.begin(); it != shards.end(); ++it) {
+        if(!(*it)->save(stream)) {
+            return false;
+        }
+    }
+    return true;
+}
+
+template<class T>
+bool Algorithm<T>::load(istream& stream) {
+    return read_snapshot(stream, false);
+}
+
+template<class T>
+bool Algorithm<T>::merge(istream& stream) {
+    return read_snapshot(stream, true);
+}
+
+template<class T>
+bool Algorithm<T>::read_snapshot(istream& stream, bool merge) {
+    uint32_t threads;
+    vector<long long int> snapshot_N;
+    if(!Snapshot::read(stream, threads) || threads != shards.size() || !Snapshot::read_vector(stream, snapshot_N) ||
+            snapshot_N.size() != shards.size()) {
+        return false;
+    }
+    for(unsigned int i = 0; i < shards.size(); ++i) {
+        if(!(merge ? shards[i]->merge(stream) : shards[i]->load(stream))) {
+            return false;
+        }
+        shard_N[i] = merge ? shard_N[i] + snapshot_N[i] : snapshot_N[i];
+    }
+    N = 0;
+    for(auto it = shard_N.begin(); it != shard_N.end(); ++it) {
+        N += *it;
+    }
+    return true;
+}
+
+
+}
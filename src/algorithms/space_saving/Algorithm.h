@@ -3,6 +3,7 @@
 
 #include "algorithms/GenericAlgorithm.h"
 #include "algorithms/space_saving/Types.h"
+#include "utils/Snapshot.h"
 
 
 namespace SpaceSaving {
@@ -22,17 +23,31 @@ private:
     double threshold;
     TicketUtils ticket_generator;
 
-    bool insert_element(Element<T>& element) override;
+    friend class GenericAlgorithm<Element, T, FrequencyOrder<Element<T>>>;
 
-    void update_element(Element<T>& element) override;
+    bool insert_element(Element<T>& element) final;
+
+    void update_element(Element<T>& element) final;
+
+    bool read_snapshot(istream& stream, bool merge);
 
 public:
 
     Algorithm(const InputParser& parameters);
 
+    void process_elements(const T* begin, size_t n) override;
+
     FrequencyOrder<Element<T>>& get_frequency_order() override;
 
     unordered_map<string, double> get_custom_stats() override;
+
+    bool save(ostream& stream) override;
+
+    bool load(istream& stream) override;
+
+    // Mergeable summaries (Agarwal et al.): the counts of both summaries are added and the m largest are kept.
+    // An element not monitored by a full summary is counted with its minimum count, so counts stay upper bounds.
+    bool merge(istream& stream) override;
 };
 
 
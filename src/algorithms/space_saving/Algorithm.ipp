@@ -1,4 +1,5 @@
 #include "algorithms/space_saving/Algorithm.h"
+#include <algorithm>
 
 
 namespace SpaceSaving {
@@ -19,7 +20,7 @@ Algorithm<T>::Algorithm(const InputParser& parameters) {
     } else {
         seed = -1;
     }
-    ticket_generator = TicketUtils(seed);
+    ticket_generator = TicketUtils(seed, parameters.has_parameter("-fast_rng"));
 }
 
 template<class T>
@@ -27,6 +28,13 @@ FrequencyOrder<Element<T>>& Algorithm<T>::get_frequency_order() {
     return frequency_order;
 }
 
+template<class T>
+void Algorithm<T>::process_elements(const T* begin, size_t n) {
+    for(const T* it = begin; it != begin + n; ++it) {
+        this->insert_or_update(this, *it);
+    }
+}
+
 template<class T>
 bool Algorithm<T>::insert_element(Element<T>& element) {
     if(this->sample_size() < m) {
@@ -55,5 +63,82 @@ unordered_map<string, double> Algorithm<T>::get_custom_stats() {
     return stats;
 }
 
+template<class T>
+bool Algorithm<T>::save(ostream& stream) {
+    vector<T> ids;
+    vector<unsigned int> counts;
+    for(auto it = frequency_order.begin(); it != frequency_order.end(); ++it) {
+        ids.push_back((*it)->id);
+        counts.push_back((*it)->get_freq());
+    }
+    Snapshot::write(stream, this->N);
+    Snapshot::write(stream, m);
+    Snapshot::write_vector(stream, ids);
+    Snapshot::write_vector(stream, counts);
+    ticket_generator.save(stream);
+    return (bool) stream;
+}
 
-}
\ No newline at end of file
+template<class T>
+bool Algorithm<T>::load(istream& stream) {
+    return read_snapshot(stream, false);
+}
+
+template<class T>
+bool Algorithm<T>::merge(istream& stream) {
+    return read_snapshot(stream, true);
+}
+
+template<class T>
+bool Algorithm<T>::read_snapshot(istream& stream, bool merge) {
+    int N;
+    unsigned int snapshot_m;
+    vector<T> ids;
+    vector<unsigned int> counts;
+    TicketUtils snapshot_ticket_generator;
+    if(!Snapshot::read(stream, N) || !Snapshot::read(stream, snapshot_m) || !Snapshot::read_vector(stream, ids) ||
+            !Snapshot::read_vector(stream, counts) || ids.size() != counts.size() || !snapshot_ticket_generator.load(stream)) {
+        return false;
+    }
+
+    // The elements are kept in the order of the frequency order, so loading a snapshot restores it exactly
+    vector<pair<T, unsigned int>> elements;
+    if(merge) {
+        unsigned int min_count = this->sample_size() == m ? frequency_order.back()->get_freq() : 0;
+        unsigned int snapshot_min_count = !ids.empty() && ids.size() == snapshot_m ? counts.back() : 0;
+        unordered_map<T, size_t> positions;
+        for(auto it = frequency_order.begin(); it != frequency_order.end(); ++it) {
+            positions[(*it)->id] = elements.size();
+            elements.emplace_back((*it)->id, (*it)->get_freq() + snapshot_min_count);
+        }
+        for(size_t i = 0; i < ids.size(); ++i) {
+            auto position = positions.find(ids[i]);
+            if(position != positions.end()) {
+                elements[position->second].second += counts[i] - snapshot_min_count;
+            } else {
+                elements.emplace_back(ids[i], counts[i] + min_count);
+            }
+        }
+        N += this->N;
+    } else {
+        for(size_t i = 0; i < ids.size(); ++i) {
+            elements.emplace_back(ids[i], counts[i]);
+        }
+        ticket_generator = snapshot_ticket_generator;
+    }
+    stable_sort(elements.begin(), elements.end(), [](const pair<T, unsigned int>& a, const pair<T, unsigned int>& b) { return a.second > b.second; });
+    if(elements.size() > m) {
+        elements.resize(m);
+    }
+
+    this->clear_monitored_elements();
+    frequency_order = FrequencyOrder<Element<T>>();
+    for(auto it = elements.begin(); it != elements.end(); ++it) {
+        frequency_order.push_back(&this->add_element(it->first), it->second);
+    }
+    this->N = N;
+    return true;
+}
+
+
+}
@@ -3,6 +3,7 @@
 
 #include "algorithms/GenericAlgorithm.h"
 #include "algorithms/sticky_sampling/Types.h"
+#include <vector>
 
 
 namespace StickySampling {
@@ -26,6 +27,14 @@ private:
 
     TicketUtils ticket_generator;
 
+    // Number of new elements that will be rejected before the next one is sampled
+    uint64_t skipped_insertions = 0;
+
+    // Reused in every resampling
+    vector<Element<T>*> resampled_elements;
+
+    void resample();
+
     void process_element(const T& element_id) override;
 
     bool insert_element(Element<T>& element) override;
@@ -38,6 +47,8 @@ public:
 
     Algorithm(const InputParser& parameters);
 
+    void process_elements(const T* begin, size_t n) override;
+
     FrequencyOrder<Element<T>>& get_frequency_order() override;
 
     double get_frequency_threshold(double f) const override;
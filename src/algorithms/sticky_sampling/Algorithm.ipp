@@ -1,6 +1,5 @@
 #include "algorithms/sticky_sampling/Algorithm.h"
 #include <math.h>
-#include <list>
 
 
 namespace StickySampling {
@@ -20,7 +19,7 @@ Algorithm<T>::Algorithm(const InputParser& parameters) {
     } else {
         seed = -1;
     }
-    ticket_generator = TicketUtils(seed);
+    ticket_generator = TicketUtils(seed, parameters.has_parameter("-fast_rng"));
 }
 
 template<class T>
@@ -28,45 +27,57 @@ FrequencyOrder<Element<T>>& Algorithm<T>::get_frequency_order() {
     return frequency_order;
 }
 
+template<class T>
+void Algorithm<T>::resample() {
+    // Following procedure described for CountingSamples because I believe the one explained in StickySampling is wrong.
+    // The frequency is decremented while the coin tosses fail: the first toss is unbiased and the rest succeed with
+    // probability 1/r, so the number of decrements is drawn at once with a Bernoulli and a geometric distribution.
+    // The elements are copied first because updating a key moves the element inside the frequency order.
+    resampled_elements.assign(frequency_order.begin(), frequency_order.end());
+    for(Element<T>* element : resampled_elements) {
+        if(toss_coin(0.5)) {
+            continue;
+        }
+        uint64_t failed_tosses = 1 + ticket_generator.generate_geometric(1 / double(r));
+        if(failed_tosses >= element->get_freq()) {
+            frequency_order.remove_element(element);
+            this->remove_element(element->id);
+        } else {
+            frequency_order.update_key(element, &Element<T>::freq, element->get_freq() - failed_tosses);
+        }
+    }
+    resampled_elements.clear();
+}
+
 template<class T>
 void Algorithm<T>::process_element(const T& element_id) {
     if(this->N == next_resampling) {
         next_resampling *= 2;
         r *= 2;
-        list<Element<T>*> removed_elements;
-        for(auto it = frequency_order.begin(); it != frequency_order.end(); ++it) {
-            Element<T>* element = *it;
-            unsigned int new_freq = element->get_freq();
-            bool first = true;
-            // Naive implementation. Not optimized.
-            // Following procedure described for CountingSamples because I believe the one explained in StickySampling is wrong.
-            while(new_freq > 0 and !(first ? toss_coin(0.5) : toss_coin(1 / double(r)))) {
-                new_freq--;
-                first = false;
-            }
-            if(new_freq == 0) {
-                removed_elements.push_back(element);
-            } else {
-                frequency_order.update_key(element, &Element<T>::freq, new_freq);
-            }
-        }
-        for(auto it = removed_elements.begin(); it != removed_elements.end(); ++it) {
-            frequency_order.remove_element(*it);
-            this->remove_element((*it)->id);
-        }
+        resample();
+        // As the coin tosses are independent, the rejections are drawn again for the new sampling rate
+        skipped_insertions = ticket_generator.generate_geometric(1 / double(r));
     }
     GenericAlgorithm<Element, T, FrequencyOrder<Element<T>>>::process_element(element_id);
 }
 
+template<class T>
+void Algorithm<T>::process_elements(const T* begin, size_t n) {
+    for(const T* it = begin; it != begin + n; ++it) {
+        Algorithm<T>::process_element(*it);
+    }
+}
+
 template<class T>
 bool Algorithm<T>::insert_element(Element<T>& element) {
-    if(toss_coin(1 / double(r))) {
-        element.freq = 1;
-        frequency_order.insert_element(&element);
-        return true;
-    } else {
+    if(skipped_insertions > 0) {
+        --skipped_insertions;
         return false;
     }
+    skipped_insertions = ticket_generator.generate_geometric(1 / double(r));
+    element.freq = 1;
+    frequency_order.insert_element(&element);
+    return true;
 }
 
 template<class T>
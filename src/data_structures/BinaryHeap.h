@@ -2,6 +2,7 @@
 #define _BinaryHeap_H_
 
 #include "utils/Misc.h"
+#include "utils/Profiler.h"
 #include <vector>
 
 
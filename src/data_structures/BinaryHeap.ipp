@@ -17,11 +17,13 @@ Element* BinaryHeap<Element, comparator_func, locator_field>::top() const {
 
 template<class Element, ComparatorFunction<Element> comparator_func, ClassField<Element, Locator> locator_field>
 Element* BinaryHeap<Element, comparator_func, locator_field>::pop() {
+    Profiler::Scope scope(Profiler::HEAP_UPDATE);
     return pop(0);
 }
 
 template<class Element, ComparatorFunction<Element> comparator_func, ClassField<Element, Locator> locator_field>
 void BinaryHeap<Element, comparator_func, locator_field>::remove_element(Element* element) {
+    Profiler::Scope scope(Profiler::HEAP_UPDATE);
     pop(element->*locator_field);
 }
 
@@ -42,12 +44,14 @@ Element* BinaryHeap<Element, comparator_func, locator_field>::pop(Locator locato
 
 template<class Element, ComparatorFunction<Element> comparator_func, ClassField<Element, Locator> locator_field>
 void BinaryHeap<Element, comparator_func, locator_field>::push(Element* element) {
+    Profiler::Scope scope(Profiler::HEAP_UPDATE);
     v.push_back(element);
     key_updated(this->size() - 1);
 }
 
 template<class Element, ComparatorFunction<Element> comparator_func, ClassField<Element, Locator> locator_field>
 Element* BinaryHeap<Element, comparator_func, locator_field>::pop_and_push(Element* element) {
+    Profiler::Scope scope(Profiler::HEAP_UPDATE);
     assert(!empty());
     v.push_back(element);
     return pop();
@@ -56,6 +60,7 @@ Element* BinaryHeap<Element, comparator_func, locator_field>::pop_and_push(Eleme
 template<class Element, ComparatorFunction<Element> comparator_func, ClassField<Element, Locator> locator_field>
 void BinaryHeap<Element, comparator_func, locator_field>::pop_and_push(
         Element* replaced_element, Element* element) {
+    Profiler::Scope scope(Profiler::HEAP_UPDATE);
     v[replaced_element->*locator_field] = element;
     element->*locator_field = replaced_element->*locator_field;
     replaced_element->*locator_field = -1;
@@ -69,6 +74,7 @@ bool BinaryHeap<Element, comparator_func, locator_field>::is_inside(Element* ele
 
 template<class Element, ComparatorFunction<Element> comparator_func, ClassField<Element, Locator> locator_field>
 void BinaryHeap<Element, comparator_func, locator_field>::key_updated(Element* element) {
+    Profiler::Scope scope(Profiler::HEAP_UPDATE);
     key_updated(element->*locator_field);
 }
 
@@ -0,0 +1,78 @@
+#ifndef _ElementTable_H_
+#define _ElementTable_H_
+
+#include <vector>
+#include <memory>
+#include <functional>
+#include <type_traits>
+
+namespace ElementTable {
+
+
+using namespace std;
+
+template<class T, class Element>
+class ElementTable {
+// - Constant time lookup, insertion and deletion through open addressing (linear probing with backward shift deletion).
+// - Elements live in a slab of fixed size blocks, so their addresses are stable and creating or destroying them
+//   doesn't allocate memory once the slab is big enough.
+// - Elements are created (create) before deciding whether to insert (insert) or to throw them away (discard).
+
+private:
+
+    struct Slot {
+        T id;
+        Element* element = nullptr;
+    };
+
+    typedef typename aligned_storage<sizeof(Element), alignof(Element)>::type Storage;
+
+    vector<Slot> slots;
+    size_t mask = 0;
+    size_t count = 0;
+
+    vector<unique_ptr<Storage[]>> blocks;
+    vector<Element*> free_elements;
+    size_t slab_size = 0;
+
+    size_t get_home(const T& id) const;
+
+    size_t find_slot(const T& id) const;
+
+    void grow_slab(size_t size);
+
+    void rehash(size_t capacity);
+
+public:
+
+    ElementTable() {}
+
+    ElementTable(const ElementTable&) = delete;
+
+    ElementTable& operator=(const ElementTable&) = delete;
+
+    ~ElementTable();
+
+    void reserve(size_t n);
+
+    Element* find(const T& id) const;
+
+    Element* create(const T& id);
+
+    void insert(Element* element);
+
+    void discard(Element* element);
+
+    void erase(const T& id);
+
+    void clear();
+
+    size_t size() const;
+};
+
+
+}
+
+#include "data_structures/ElementTable.ipp"
+
+#endif //_ElementTable_H_
@@ -0,0 +1,151 @@
+#include "data_structures/ElementTable.h"
+#include <assert.h>
+#include <cstdint>
+
+namespace ElementTable {
+
+
+template<class T, class Element>
+ElementTable<T, Element>::~ElementTable() {
+    for(auto it = slots.begin(); it != slots.end(); ++it) {
+        if(it->element != nullptr) {
+            it->element->~Element();
+        }
+    }
+}
+
+template<class T, class Element>
+void ElementTable<T, Element>::reserve(size_t n) {
+    // The load factor is kept below 1/2
+    size_t capacity = 16;
+    while(capacity < 2 * n) {
+        capacity *= 2;
+    }
+    if(capacity > slots.size()) {
+        rehash(capacity);
+    }
+    if(n > slab_size) {
+        grow_slab(n - slab_size);
+    }
+}
+
+template<class T, class Element>
+size_t ElementTable<T, Element>::get_home(const T& id) const {
+    // Finalizer of MurmurHash3, since std::hash is usually the identity for integers
+    uint64_t h = hash<T>()(id);
+    h ^= h >> 33;
+    h *= 0xff51afd7ed558ccdULL;
+    h ^= h >> 33;
+    return h & mask;
+}
+
+template<class T, class Element>
+size_t ElementTable<T, Element>::find_slot(const T& id) const {
+    size_t i = get_home(id);
+    while(slots[i].element != nullptr && !(slots[i].id == id)) {
+        i = (i + 1) & mask;
+    }
+    return i;
+}
+
+template<class T, class Element>
+Element* ElementTable<T, Element>::find(const T& id) const {
+    if(slots.empty()) {
+        return nullptr;
+    }
+    return slots[find_slot(id)].element;
+}
+
+template<class T, class Element>
+Element* ElementTable<T, Element>::create(const T& id) {
+    if(free_elements.empty()) {
+        grow_slab(max<size_t>(slab_size, 64));
+    }
+    Element* element = free_elements.back();
+    free_elements.pop_back();
+    new (element) Element(id);
+    return element;
+}
+
+template<class T, class Element>
+void ElementTable<T, Element>::insert(Element* element) {
+    if(2 * (count + 1) > slots.size()) {
+        rehash(max<size_t>(16, 2 * slots.size()));
+    }
+    size_t i = find_slot(element->id);
+    assert(slots[i].element == nullptr);
+    slots[i].id = element->id;
+    slots[i].element = element;
+    ++count;
+}
+
+template<class T, class Element>
+void ElementTable<T, Element>::discard(Element* element) {
+    element->~Element();
+    free_elements.push_back(element);
+}
+
+template<class T, class Element>
+void ElementTable<T, Element>::erase(const T& id) {
+    size_t i = find_slot(id);
+    assert(slots[i].element != nullptr);
+    discard(slots[i].element);
+    --count;
+    // The following elements of the cluster are shifted back so there are no holes in it
+    size_t j = i;
+    while(true) {
+        j = (j + 1) & mask;
+        if(slots[j].element == nullptr) {
+            break;
+        }
+        size_t home = get_home(slots[j].id);
+        if(i <= j ? (i < home && home <= j) : (i < home || home <= j)) {
+            continue; // It can't be moved before its home
+        }
+        slots[i] = slots[j];
+        i = j;
+    }
+    slots[i].element = nullptr;
+}
+
+template<class T, class Element>
+void ElementTable<T, Element>::clear() {
+    for(auto it = slots.begin(); it != slots.end(); ++it) {
+        if(it->element != nullptr) {
+            discard(it->element);
+            it->element = nullptr;
+        }
+    }
+    count = 0;
+}
+
+template<class T, class Element>
+size_t ElementTable<T, Element>::size() const {
+    return count;
+}
+
+template<class T, class Element>
+void ElementTable<T, Element>::grow_slab(size_t size) {
+    blocks.emplace_back(new Storage[size]);
+    Storage* block = blocks.back().get();
+    free_elements.reserve(free_elements.size() + size);
+    for(size_t i = size; i > 0; --i) {
+        free_elements.push_back(reinterpret_cast<Element*>(&block[i - 1]));
+    }
+    slab_size += size;
+}
+
+template<class T, class Element>
+void ElementTable<T, Element>::rehash(size_t capacity) {
+    vector<Slot> old_slots(capacity);
+    old_slots.swap(slots);
+    mask = capacity - 1;
+    for(auto it = old_slots.begin(); it != old_slots.end(); ++it) {
+        if(it->element != nullptr) {
+            slots[find_slot(it->id)] = *it;
+        }
+    }
+}
+
+
+}
@@ -2,6 +2,7 @@
 #define _SortedList_H_
 
 #include "utils/Misc.h"
+#include "utils/Profiler.h"
 #include <list>
 
 namespace SortedList {
@@ -6,6 +6,7 @@ namespace SortedList {
 
 template<class Element, ClassField<Element, Locator<Element>> locator_field>
 void SortedList<Element, locator_field>::insert_element(Element* element) {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     if(bucket_list.empty() || prev(bucket_list.end())->key != 1) {
         // There are no buckets or the smallest one has key greater than 1
         bucket_list.emplace_back(1);
@@ -15,6 +16,7 @@ void SortedList<Element, locator_field>::insert_element(Element* element) {
 
 template<class Element, ClassField<Element, Locator<Element>> locator_field>
 void SortedList<Element, locator_field>::insert_element(Element* element, typename BucketList<Element>::iterator bucket) {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     Iterator<Element> iterator = Iterator<Element>(&bucket_list);
     iterator.bucket_iterator = bucket;
     iterator.bucket_iterator->elements.emplace_front(element);
@@ -25,6 +27,7 @@ void SortedList<Element, locator_field>::insert_element(Element* element, typena
 
 template<class Element, ClassField<Element, Locator<Element>> locator_field>
 void SortedList<Element, locator_field>::remove_element(Element* element) {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     Iterator<Element> iterator = element->*locator_field;
     iterator.bucket_iterator->elements.erase(iterator.element_iterator);
     if(iterator.bucket_iterator->elements.empty()) {
@@ -35,6 +38,7 @@ void SortedList<Element, locator_field>::remove_element(Element* element) {
 
 template<class Element, ClassField<Element, Locator<Element>> locator_field>
 Element* SortedList<Element, locator_field>::pop_back() {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     Element* removed_element = bucket_list.back().elements.back();
     remove_element(removed_element);
     return removed_element;
@@ -42,6 +46,7 @@ Element* SortedList<Element, locator_field>::pop_back() {
 
 template<class Element, ClassField<Element, Locator<Element>> locator_field>
 Element* SortedList<Element, locator_field>::replace_back(Element* element) {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     assert(!bucket_list.empty());
     Iterator<Element>& iterator = element->*locator_field;
     iterator.bucket_iterator = prev(bucket_list.end());
@@ -61,6 +66,7 @@ Element* SortedList<Element, locator_field>::back() {
 
 template<class Element, ClassField<Element, Locator<Element>> locator_field>
 void SortedList<Element, locator_field>::increase_key(Element* element) {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     Iterator<Element>& iterator = element->*locator_field;
     int new_key = iterator.bucket_iterator->key + 1;
     if(iterator.bucket_iterator == bucket_list.begin() || prev(iterator.bucket_iterator)->key != new_key) { // It is the highest bucket or the next bucket doesn't have the required key
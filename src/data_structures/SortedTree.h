@@ -2,6 +2,7 @@
 #define _SortedTree_H_
 
 #include "utils/Misc.h"
+#include "utils/Profiler.h"
 #include <set>
 
 namespace SortedTree {
@@ -6,17 +6,20 @@ namespace SortedTree {
 
 template<class Element, ComparatorFunction<Element> comparator_func, ClassField<Element, Locator<Element, comparator_func>> locator_field>
 void SortedTree<Element, comparator_func, locator_field>::insert_element(Element* element) {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     element->*locator_field = s.insert(element);
 }
 
 template<class Element, ComparatorFunction<Element> comparator_func, ClassField<Element, Locator<Element, comparator_func>> locator_field>
 void SortedTree<Element, comparator_func, locator_field>::remove_element(Element* element) {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     s.erase(element->*locator_field);
 }
 
 template<class Element, ComparatorFunction<Element> comparator_func, ClassField<Element, Locator<Element, comparator_func>> locator_field>
 template<class KeyType, class Field>
 void SortedTree<Element, comparator_func, locator_field>::update_key(Element* element, Field key_field, KeyType new_key) {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     // It's needed to remove and reinsert an element since there isn't an "update" method in multiset.
     Locator<Element, comparator_func> hint = next(element->*locator_field);
     s.erase(element->*locator_field);
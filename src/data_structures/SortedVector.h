@@ -2,6 +2,7 @@
 #define _SortedVector_H_
 
 #include "utils/Misc.h"
+#include "utils/Profiler.h"
 #include <vector>
 #include <list>
 
@@ -61,7 +62,10 @@ public:
     SortedVector(unsigned int m);
 
     void insert_element(Element* element);
-    
+
+    // Inserts an element with a key not greater than the one of the last element (used to rebuild the container)
+    void push_back(Element* element, KeyType key);
+
     Element* pop_back();
 
     Element* replace_back(Element* element);
@@ -10,6 +10,7 @@ SortedVector<Element, locator_field>::SortedVector(unsigned int m) {
 }
 template<class Element, ClassField<Element, Locator> locator_field>
 void SortedVector<Element, locator_field>::insert_element(Element* element) {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     v.push_back(element);
     Locator& locator = element->*locator_field;
     locator.pos = v.size() - 1;
@@ -20,8 +21,22 @@ void SortedVector<Element, locator_field>::insert_element(Element* element) {
     locator.bucket_iterator = prev(bucket_list.end());
 }
 
+template<class Element, ClassField<Element, Locator> locator_field>
+void SortedVector<Element, locator_field>::push_back(Element* element, KeyType key) {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
+    assert(bucket_list.empty() || prev(bucket_list.end())->key >= key);
+    v.push_back(element);
+    Locator& locator = element->*locator_field;
+    locator.pos = v.size() - 1;
+    if(bucket_list.empty() || prev(bucket_list.end())->key != key) {
+        bucket_list.emplace_back(key, locator.pos);
+    }
+    locator.bucket_iterator = prev(bucket_list.end());
+}
+
 template<class Element, ClassField<Element, Locator> locator_field>
 Element* SortedVector<Element, locator_field>::pop_back() {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     Element* removed_element = v.back();
     BucketListIterator bucket = (removed_element->*locator_field).bucket_iterator;
     if(is_bucket_size_one(*bucket)) {
@@ -33,6 +48,7 @@ Element* SortedVector<Element, locator_field>::pop_back() {
 
 template<class Element, ClassField<Element, Locator> locator_field>
 Element* SortedVector<Element, locator_field>::replace_back(Element* element) {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     assert(!bucket_list.empty());
     Element* removed_element = v[v.size() - 1];
     replace_element(removed_element, element);
@@ -41,6 +57,7 @@ Element* SortedVector<Element, locator_field>::replace_back(Element* element) {
 
 template<class Element, ClassField<Element, Locator> locator_field>
 void SortedVector<Element, locator_field>::replace_element(Element* replaced_element, Element* element) {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     assert(!bucket_list.empty());
     element->*locator_field = replaced_element->*locator_field;
     v[(element->*locator_field).pos] = element;
@@ -53,6 +70,7 @@ Element* SortedVector<Element, locator_field>::back() {
 
 template<class Element, ClassField<Element, Locator> locator_field>
 void SortedVector<Element, locator_field>::increase_key(Element* element) {
+    Profiler::Scope scope(Profiler::FREQUENCY_ORDER_UPDATE);
     Locator& locator = element->*locator_field;
     bool bucket_has_size_one = is_bucket_size_one(*locator.bucket_iterator);
     int new_key = locator.bucket_iterator->key + 1;
@@ -0,0 +1,30 @@
+#include "BinaryProtocol.h"
+#include <cstdio>
+
+// The elements are read and written in host byte order, so this assumes a little-endian host (x86, ARM).
+namespace BinaryProtocol {
+
+
+bool read_header(FrameHeader& header) {
+    return read_payload(&header, sizeof(FrameHeader));
+}
+
+bool read_payload(void* payload, size_t size) {
+    return fread(payload, 1, size, stdin) == size;
+}
+
+void write_frame(FrameType type, const void* payload, size_t size) {
+    FrameHeader header = {type, (int64_t) size};
+    fwrite(&header, sizeof(FrameHeader), 1, stdout);
+    if(size > 0) {
+        fwrite(payload, 1, size, stdout);
+    }
+    fflush(stdout);
+}
+
+void write_frame(FrameType type, const std::string& payload) {
+    write_frame(type, payload.data(), payload.size());
+}
+
+
+}
@@ -0,0 +1,54 @@
+#ifndef _BinaryProtocol_H_
+#define _BinaryProtocol_H_
+
+#include <cstdint>
+#include <cstddef>
+#include <string>
+
+// Framed protocol used through stdin/stdout when the -binary flag is given.
+// Every frame consists of a header with two little-endian int64 (the frame type
+// and the size of the payload in bytes) followed by the payload itself.
+//
+// Input frames:
+// - ELEMENTS: payload of packed int64 elements.
+// - FREQUENT_QUERY: payload of one double (the frequency).
+// - TOP_K_QUERY: payload of one int64 (k).
+// - STATS: empty payload.
+// - END: empty payload. The stream is finished.
+// - SAVE, LOAD, MERGE: payload with the path of the snapshot (see utils/Snapshot.h). There is no reply.
+//
+// Output frames:
+// - QUERY_RESULTS: payload of packed (int64 element, int64 frequency) pairs.
+// - STATS: payload with the same text dictionary reported in the text protocol.
+namespace BinaryProtocol {
+
+
+enum FrameType : int64_t {
+    ELEMENTS = 0,
+    FREQUENT_QUERY = 1,
+    TOP_K_QUERY = 2,
+    STATS = 3,
+    END = 4,
+    QUERY_RESULTS = 5,
+    SAVE = 6,
+    LOAD = 7,
+    MERGE = 8
+};
+
+struct FrameHeader {
+    int64_t type;
+    int64_t size;
+};
+
+bool read_header(FrameHeader& header);
+
+bool read_payload(void* payload, size_t size);
+
+void write_frame(FrameType type, const void* payload, size_t size);
+
+void write_frame(FrameType type, const std::string& payload);
+
+
+}
+
+#endif //_BinaryProtocol_H_
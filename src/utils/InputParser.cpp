@@ -1,6 +1,7 @@
 #include "InputParser.h"
 #include <iostream>
 #include <string>
+#include <stdexcept>
 
 using namespace std;
 
@@ -35,8 +36,16 @@ const string InputParser::get_parameter(const string& parameter_name) const {
     }
 }
 
+void InputParser::set_parameter(const string& parameter_name, const string& value) {
+    parameters[parameter_name] = value;
+}
+
 void InputParser::error() const {
     cerr << "Incorrect parameters." << endl;
     cerr << "Usage: k-hitting [-a algorithm] [params]" << endl;
+#ifdef NATIVE_BINDING
+    throw invalid_argument("Incorrect parameters"); // Exiting would end the Python process of the binding
+#else
     exit(1);
+#endif
 }
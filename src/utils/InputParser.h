@@ -18,6 +18,8 @@ public:
 
     const std::string get_parameter(const std::string& parameter_name) const;
 
+    void set_parameter(const std::string& parameter_name, const std::string& value);
+
     void error() const;
 
 };
@@ -0,0 +1,45 @@
+#include "LatencyHistogram.h"
+#include <algorithm>
+#include <cmath>
+
+using namespace std;
+
+LatencyHistogram::LatencyHistogram() {
+    for(int i = 0; i < NUM_BUCKETS; ++i) {
+        buckets[i] = 0;
+    }
+    count = 0;
+    max_value = 0;
+}
+
+uint64_t LatencyHistogram::get_upper_bound(int bucket) {
+    if(bucket < SUB_BUCKETS) {
+        return bucket;
+    }
+    int shift = bucket / SUB_BUCKETS - 1;
+    uint64_t lower_bound = uint64_t(SUB_BUCKETS + bucket % SUB_BUCKETS) << shift;
+    return lower_bound + ((uint64_t(1) << shift) - 1);
+}
+
+uint64_t LatencyHistogram::get_quantile(double q) const {
+    if(count == 0) {
+        return 0;
+    }
+    uint64_t rank = max(uint64_t(1), (uint64_t) ceil(q * count));
+    uint64_t accumulated = 0;
+    for(int i = 0; i < NUM_BUCKETS; ++i) {
+        accumulated += buckets[i];
+        if(accumulated >= rank) {
+            return min(get_upper_bound(i), max_value);
+        }
+    }
+    return max_value;
+}
+
+uint64_t LatencyHistogram::get_max() const {
+    return max_value;
+}
+
+uint64_t LatencyHistogram::get_count() const {
+    return count;
+}
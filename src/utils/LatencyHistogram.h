@@ -0,0 +1,50 @@
+#ifndef _LatencyHistogram_H_
+#define _LatencyHistogram_H_
+
+#include <cstdint>
+
+// Histogram of latencies in nanoseconds with logarithmic buckets. Every power of two is split in SUB_BUCKETS
+// linear buckets, so the quantiles are upper bounds with a relative error below 1 / SUB_BUCKETS.
+class LatencyHistogram {
+
+private:
+
+    static const int SUB_BUCKET_BITS = 3;
+    static const int SUB_BUCKETS = 1 << SUB_BUCKET_BITS;
+    static const int NUM_BUCKETS = (64 - SUB_BUCKET_BITS + 1) * SUB_BUCKETS;
+
+    uint64_t buckets[NUM_BUCKETS];
+    uint64_t count;
+    uint64_t max_value;
+
+    static int get_bucket(uint64_t value) {
+        if(value < SUB_BUCKETS) {
+            return (int) value;
+        }
+        int shift = 63 - __builtin_clzll(value) - SUB_BUCKET_BITS;
+        return (shift + 1) * SUB_BUCKETS + (int) ((value >> shift) & (SUB_BUCKETS - 1));
+    }
+
+    static uint64_t get_upper_bound(int bucket);
+
+public:
+
+    LatencyHistogram();
+
+    void record(uint64_t value) {
+        ++buckets[get_bucket(value)];
+        ++count;
+        if(value > max_value) {
+            max_value = value;
+        }
+    }
+
+    // Smallest bucket bound below which there are at least a fraction q of the values (0 if empty)
+    uint64_t get_quantile(double q) const;
+
+    uint64_t get_max() const;
+
+    uint64_t get_count() const;
+};
+
+#endif //_LatencyHistogram_H_
@@ -0,0 +1,113 @@
+#include "MemoryUsage.h"
+#include <atomic>
+#include <cstdlib>
+#include <fstream>
+#include <new>
+#include <string>
+#if __APPLE__
+#include <malloc/malloc.h>
+#define allocation_size(pointer) malloc_size(pointer)
+#else
+#include <malloc.h>
+#define allocation_size(pointer) malloc_usable_size(pointer)
+#endif
+
+using namespace std;
+
+namespace {
+
+
+// Relaxed atomics since the algorithms can allocate from several threads (-threads, -workers)
+atomic<size_t> allocated_bytes(0);
+atomic<size_t> peak_allocated_bytes(0);
+
+void* allocate(size_t size) {
+    void* pointer = malloc(size == 0 ? 1 : size);
+    if(pointer != nullptr) {
+        size_t allocated = allocated_bytes.fetch_add(allocation_size(pointer), memory_order_relaxed) + allocation_size(pointer);
+        size_t peak = peak_allocated_bytes.load(memory_order_relaxed);
+        while(allocated > peak && !peak_allocated_bytes.compare_exchange_weak(peak, allocated, memory_order_relaxed));
+    }
+    return pointer;
+}
+
+void deallocate(void* pointer) {
+    if(pointer != nullptr) {
+        allocated_bytes.fetch_sub(allocation_size(pointer), memory_order_relaxed);
+        free(pointer);
+    }
+}
+
+// Value in bytes of a field of /proc/self/status (given in kB)
+long long int read_status_field(const string& field) {
+    ifstream status("/proc/self/status");
+    string name;
+    long long int value;
+    while(status >> name) {
+        if(name == field) {
+            return status >> value ? value * 1024 : -1;
+        }
+        status.ignore(256, '\n');
+    }
+    return -1;
+}
+
+
+}
+
+// Not replaced in the Python binding: the library shares the heap with the interpreter and its other extensions
+#ifndef NATIVE_BINDING
+
+void* operator new(size_t size) {
+    void* pointer = allocate(size);
+    if(pointer == nullptr) {
+        throw bad_alloc();
+    }
+    return pointer;
+}
+
+void* operator new[](size_t size) {
+    return operator new(size);
+}
+
+void* operator new(size_t size, const nothrow_t&) noexcept {
+    return allocate(size);
+}
+
+void* operator new[](size_t size, const nothrow_t&) noexcept {
+    return allocate(size);
+}
+
+void operator delete(void* pointer) noexcept {
+    deallocate(pointer);
+}
+
+void operator delete[](void* pointer) noexcept {
+    deallocate(pointer);
+}
+
+void operator delete(void* pointer, const nothrow_t&) noexcept {
+    deallocate(pointer);
+}
+
+void operator delete[](void* pointer, const nothrow_t&) noexcept {
+    deallocate(pointer);
+}
+
+#endif
+
+size_t MemoryUsage::get_allocated_bytes() {
+    return allocated_bytes.load(memory_order_relaxed);
+}
+
+size_t MemoryUsage::get_peak_allocated_bytes() {
+    return peak_allocated_bytes.load(memory_order_relaxed);
+}
+
+long long int MemoryUsage::get_resident_bytes() {
+    return read_status_field("VmRSS:");
+}
+
+long long int MemoryUsage::get_peak_resident_bytes() {
+    return read_status_field("VmHWM:");
+}
@@ -0,0 +1,25 @@
+#ifndef _MemoryUsage_H_
+#define _MemoryUsage_H_
+
+#include <cstddef>
+
+// Memory used by the process, measured without external profilers. The global operator new and delete are
+// replaced (MemoryUsage.cpp) to count the heap bytes in use by the containers of the algorithms (and the small
+// I/O buffers of the binary), and the resident set size is read from /proc.
+namespace MemoryUsage {
+
+
+// Bytes currently allocated through operator new and the maximum reached (always 0 in the Python binding)
+size_t get_allocated_bytes();
+
+size_t get_peak_allocated_bytes();
+
+// Resident set size of the process and its maximum (-1 if not available)
+long long int get_resident_bytes();
+
+long long int get_peak_resident_bytes();
+
+
+}
+
+#endif //_MemoryUsage_H_
@@ -0,0 +1,177 @@
+#include "Profiler.h"
+#include <algorithm>
+#include <chrono>
+#include <cstring>
+#if defined(__x86_64__) || defined(__i386__)
+#include <x86intrin.h>
+#endif
+#ifdef __linux__
+#include <linux/perf_event.h>
+#include <sys/syscall.h>
+#include <unistd.h>
+#endif
+
+using namespace std;
+
+namespace Profiler {
+
+
+thread_local Profile* active = nullptr;
+
+namespace {
+
+
+const char* COUNTER_NAMES[NUM_COUNTERS] = {"cycles", "instructions", "cache_misses"};
+const char* PHASE_NAMES[NUM_PHASES] = {"process_element", "hash_lookup", "ticket_generation", "heap_update", "frequency_order_update"};
+
+// Group of hardware counters of a thread, shared by all the profiles processed in it (only the differences between
+// two reads are accumulated). They are opened the first time the thread profiles an element
+struct CounterGroup {
+
+    bool opened = false;
+    int group_fd = -1; // Leader of the group, -1 when the time stamp counter is used
+
+    ~CounterGroup() {
+#ifdef __linux__
+        if(group_fd != -1) {
+            close(group_fd); // The rest of counters of the group are closed with the process
+        }
+#endif
+    }
+};
+
+thread_local CounterGroup counters;
+
+#ifdef __linux__
+int open_counter(uint64_t config, int group_fd) {
+    perf_event_attr attributes;
+    memset(&attributes, 0, sizeof(perf_event_attr));
+    attributes.size = sizeof(perf_event_attr);
+    attributes.type = PERF_TYPE_HARDWARE;
+    attributes.config = config;
+    attributes.read_format = PERF_FORMAT_GROUP;
+    attributes.exclude_kernel = 1;
+    attributes.exclude_hv = 1;
+    return (int) syscall(__NR_perf_event_open, &attributes, 0, -1, group_fd, 0); // Only the calling thread
+}
+#endif
+
+void open_counters() {
+    counters.opened = true;
+#ifdef __linux__
+    uint64_t configs[NUM_COUNTERS] = {PERF_COUNT_HW_CPU_CYCLES, PERF_COUNT_HW_INSTRUCTIONS, PERF_COUNT_HW_CACHE_MISSES};
+    int fds[NUM_COUNTERS];
+    for(int i = 0; i < NUM_COUNTERS; ++i) {
+        fds[i] = open_counter(configs[i], i == 0 ? -1 : fds[0]);
+        if(fds[i] == -1) { // Not supported or not allowed (perf_event_paranoid), the time stamp counter is used instead
+            for(int j = 0; j < i; ++j) {
+                close(fds[j]);
+            }
+            return;
+        }
+    }
+    counters.group_fd = fds[0];
+#endif
+}
+
+CycleSource get_source() {
+    if(!counters.opened) {
+        open_counters();
+    }
+    return counters.group_fd != -1 ? HARDWARE_COUNTERS : TIME_STAMP_COUNTER;
+}
+
+void read_counters(CycleSource source, uint64_t* values) {
+#ifdef __linux__
+    if(source == HARDWARE_COUNTERS) {
+        uint64_t group[1 + NUM_COUNTERS];
+        if(read(counters.group_fd, group, sizeof(group)) == sizeof(group)) {
+            memcpy(values, group + 1, sizeof(uint64_t) * NUM_COUNTERS);
+        }
+        return;
+    }
+#endif
+#if defined(__x86_64__) || defined(__i386__)
+    values[0] = __rdtsc();
+#else
+    values[0] = chrono::duration_cast<chrono::nanoseconds>(chrono::steady_clock::now().time_since_epoch()).count();
+#endif
+    values[1] = 0;
+    values[2] = 0;
+}
+
+
+}
+
+Profile::Profile(unsigned int sample_period) : sample_period(max(1u, sample_period)), countdown(this->sample_period) {
+    memset(in_phase, 0, sizeof(in_phase));
+    memset(total, 0, sizeof(total));
+    memset(calls, 0, sizeof(calls));
+    memset(elements, 0, sizeof(elements));
+}
+
+bool Profile::start_element() {
+    if(--countdown > 0) {
+        return false;
+    }
+    countdown = sample_period;
+    source = get_source();
+    active = this;
+    ++elements[source];
+    return start_phase(PROCESS_ELEMENT);
+}
+
+void Profile::end_element() {
+    end_phase(PROCESS_ELEMENT);
+    active = nullptr;
+}
+
+bool Profile::start_phase(Phase phase) {
+    if(in_phase[phase]) {
+        return false;
+    }
+    in_phase[phase] = true;
+    read_counters(source, start[phase]);
+    return true;
+}
+
+void Profile::end_phase(Phase phase) {
+    uint64_t values[NUM_COUNTERS];
+    memcpy(values, start[phase], sizeof(values)); // Nothing is counted if the counters can't be read
+    read_counters(source, values);
+    for(int i = 0; i < NUM_COUNTERS; ++i) {
+        total[source][phase][i] += values[i] - start[phase][i];
+    }
+    ++calls[source][phase];
+    in_phase[phase] = false;
+}
+
+void report(ostream& stream, const vector<const Profile*>& profiles) {
+    uint64_t elements[NUM_CYCLE_SOURCES] = {0, 0};
+    for(const Profile* profile : profiles) {
+        for(int source = 0; source < NUM_CYCLE_SOURCES; ++source) {
+            elements[source] += profile->elements[source];
+        }
+    }
+    CycleSource source = elements[HARDWARE_COUNTERS] > 0 ? HARDWARE_COUNTERS : TIME_STAMP_COUNTER;
+    stream << "'cost_profiled_elements': " << elements[source] << ",";
+    stream << "'cost_hardware_counters': " << (source == HARDWARE_COUNTERS) << ",";
+    for(int phase = 0; phase < NUM_PHASES; ++phase) {
+        uint64_t calls = 0;
+        uint64_t total[NUM_COUNTERS] = {0, 0, 0};
+        for(const Profile* profile : profiles) {
+            calls += profile->calls[source][phase];
+            for(int i = 0; i < NUM_COUNTERS; ++i) {
+                total[i] += profile->total[source][phase][i];
+            }
+        }
+        // Without hardware counters only the cycles of the time stamp counter are available
+        for(int i = 0; i < (source == HARDWARE_COUNTERS ? NUM_COUNTERS : 1); ++i) {
+            stream << "'cost_" << PHASE_NAMES[phase] << "_" << COUNTER_NAMES[i] << "': " << (elements[source] > 0 ? double(total[i]) / elements[source] : 0) << ",";
+        }
+        stream << "'cost_" << PHASE_NAMES[phase] << "_calls': " << (elements[source] > 0 ? double(calls) / elements[source] : 0) << ",";
+    }
+}
+
+
+}
@@ -0,0 +1,116 @@
+#ifndef _Profiler_H_
+#define _Profiler_H_
+
+#include <cstdint>
+#include <ostream>
+#include <vector>
+
+// Built-in cost profiling (-cost_profile P). One of every P elements processed by an algorithm instance is profiled:
+// the cost of processing it and of each phase inside it is read from the hardware counters (cycles, instructions and
+// cache misses through perf_event_open on Linux) or from the time stamp counter when they aren't available.
+// Every instance owns its Profile, so several instances in the same process (e.g. the native binding) are reported
+// separately. The phases are marked with a Scope in the data structures, so the algorithms don't need to be changed.
+namespace Profiler {
+
+
+enum Phase {
+    PROCESS_ELEMENT,
+    HASH_LOOKUP,
+    TICKET_GENERATION,
+    HEAP_UPDATE,
+    FREQUENCY_ORDER_UPDATE,
+    NUM_PHASES
+};
+
+// Where the counters of a profiled element are read from. The cycles of both sources aren't comparable, so they are
+// accumulated separately
+enum CycleSource {
+    TIME_STAMP_COUNTER,
+    HARDWARE_COUNTERS,
+    NUM_CYCLE_SOURCES
+};
+
+const int NUM_COUNTERS = 3;
+
+// Counters of an algorithm instance. An instance is only processed by one thread at a time, so it isn't synchronized.
+// The phases can be nested (e.g. the ticket generation inside the processing of an element), but a phase inside
+// itself is only counted once
+class Profile {
+
+private:
+
+    unsigned int sample_period;
+    unsigned int countdown;
+    CycleSource source; // Of the element being profiled
+    uint64_t start[NUM_PHASES][NUM_COUNTERS];
+    bool in_phase[NUM_PHASES];
+    uint64_t total[NUM_CYCLE_SOURCES][NUM_PHASES][NUM_COUNTERS];
+    uint64_t calls[NUM_CYCLE_SOURCES][NUM_PHASES];
+    uint64_t elements[NUM_CYCLE_SOURCES];
+
+    friend void report(std::ostream& stream, const std::vector<const Profile*>& profiles);
+
+public:
+
+    Profile(unsigned int sample_period);
+
+    bool start_element();
+
+    void end_element();
+
+    bool start_phase(Phase phase);
+
+    void end_phase(Phase phase);
+};
+
+// Profile of the element being processed by the current thread, nullptr if it isn't profiled
+extern thread_local Profile* active;
+
+// Average cost per profiled element of every phase over all the profiles (Python dictionary entries, as in the :s
+// command). If some elements were profiled with hardware counters only those are reported, otherwise the ones timed
+// with the time stamp counter. cost_hardware_counters tells which source was used
+void report(std::ostream& stream, const std::vector<const Profile*>& profiles);
+
+// Profiles the element being processed if it's sampled. The profile is nullptr when profiling is disabled, so the cost
+// is a branch per element
+class ElementScope {
+
+private:
+
+    Profile* profile;
+    bool profiled;
+
+public:
+
+    ElementScope(Profile* profile) : profile(profile), profiled(profile != nullptr && profile->start_element()) {}
+
+    ~ElementScope() {
+        if(profiled) {
+            profile->end_element();
+        }
+    }
+};
+
+class Scope {
+
+private:
+
+    Phase phase;
+    Profile* profile;
+    bool profiled;
+
+public:
+
+    Scope(Phase phase) : phase(phase), profile(active), profiled(active != nullptr && active->start_phase(phase)) {}
+
+    ~Scope() {
+        if(profiled) {
+            profile->end_phase(phase);
+        }
+    }
+};
+
+
+}
+
+#endif //_Profiler_H_
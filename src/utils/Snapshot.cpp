@@ -0,0 +1,59 @@
+#include "Snapshot.h"
+#include <cstring>
+
+using namespace std;
+
+namespace Snapshot {
+
+
+static const char MAGIC[8] = {'H', 'H', 'S', 'N', 'A', 'P', '\0', '\0'};
+static const uint32_t VERSION = 1;
+// Maximum size of the values read from streams whose length isn't known
+static const uint64_t MAX_SIZE = 1ULL << 32;
+
+void write_header(ostream& stream, const string& algorithm) {
+    stream.write(MAGIC, sizeof(MAGIC));
+    write(stream, VERSION);
+    write_string(stream, algorithm);
+}
+
+bool read_header(istream& stream, const string& algorithm) {
+    char magic[sizeof(MAGIC)];
+    uint32_t version;
+    string name;
+    return stream.read(magic, sizeof(MAGIC)) && memcmp(magic, MAGIC, sizeof(MAGIC)) == 0 &&
+           read(stream, version) && version == VERSION &&
+           read_string(stream, name) && name == algorithm;
+}
+
+bool fits(istream& stream, uint64_t count, size_t value_size) {
+    streampos position = stream.tellg();
+    uint64_t remaining = MAX_SIZE;
+    if(position != streampos(-1)) { // The bytes left in a seekable stream (e.g. a file)
+        stream.seekg(0, ios::end);
+        streampos end = stream.tellg();
+        stream.seekg(position);
+        if(end == streampos(-1) || !stream) {
+            return false;
+        }
+        remaining = (uint64_t) (end - position);
+    }
+    return count <= remaining / value_size;
+}
+
+void write_string(ostream& stream, const string& value) {
+    write(stream, (uint64_t) value.size());
+    stream.write(value.data(), value.size());
+}
+
+bool read_string(istream& stream, string& value) {
+    uint64_t size;
+    if(!read(stream, size) || !fits(stream, size, 1)) {
+        return false;
+    }
+    value.resize(size);
+    return (bool) stream.read(&value[0], size);
+}
+
+
+}
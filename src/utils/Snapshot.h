@@ -0,0 +1,59 @@
+#ifndef _Snapshot_H_
+#define _Snapshot_H_
+
+#include <cstdint>
+#include <istream>
+#include <ostream>
+#include <string>
+#include <vector>
+
+// Binary snapshots of the state of an algorithm (:save, :load and :merge commands).
+// Header: magic (8 bytes), version (uint32) and the name of the algorithm (-a) as a string.
+// It is followed by the state written by the save method of the algorithm. Values are written
+// in host byte order (the snapshots are meant to be read by the same binary on the same kind of host).
+namespace Snapshot {
+
+
+void write_header(std::ostream& stream, const std::string& algorithm);
+
+// Returns false if the stream is not a snapshot of the given algorithm
+bool read_header(std::istream& stream, const std::string& algorithm);
+
+template<class V>
+void write(std::ostream& stream, const V& value) {
+    stream.write((const char*) &value, sizeof(V));
+}
+
+template<class V>
+bool read(std::istream& stream, V& value) {
+    return (bool) stream.read((char*) &value, sizeof(V));
+}
+
+// Returns false if the stream can't contain count values of value_size bytes, so sizes read from a truncated or
+// corrupt snapshot are rejected before allocating memory for them
+bool fits(std::istream& stream, uint64_t count, size_t value_size);
+
+void write_string(std::ostream& stream, const std::string& value);
+
+bool read_string(std::istream& stream, std::string& value);
+
+template<class V>
+void write_vector(std::ostream& stream, const std::vector<V>& values) {
+    write(stream, (uint64_t) values.size());
+    stream.write((const char*) values.data(), values.size() * sizeof(V));
+}
+
+template<class V>
+bool read_vector(std::istream& stream, std::vector<V>& values) {
+    uint64_t size;
+    if(!read(stream, size) || !fits(stream, size, sizeof(V))) {
+        return false;
+    }
+    values.resize(size);
+    return (bool) stream.read((char*) values.data(), size * sizeof(V));
+}
+
+
+}
+
+#endif //_Snapshot_H_
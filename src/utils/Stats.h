@@ -4,6 +4,7 @@
 #include <chrono>
 #include <ostream>
 #include <algorithms/GenericAlgorithm.h>
+#include "LatencyHistogram.h"
 
 
 class Stats {
@@ -15,12 +16,15 @@ private:
 
     time_point initial_time;
     time_point start_time;
+    counter batch_size;
 
     counter get_interval(time_point from);
 
     void start_counting();
 
-    void finish_counting(counter& counter);
+    void finish_counting(counter& counter, LatencyHistogram& latency);
+
+    static void report_latency(std::ostream& stream, const std::string& name, const LatencyHistogram& latency);
 
 public:
 
@@ -31,6 +35,11 @@ public:
     counter process_element_time;
     counter process_element_count;
 
+    // Latencies of each query and of each batch of elements
+    LatencyHistogram frequent_query_latency;
+    LatencyHistogram top_k_query_latency;
+    LatencyHistogram process_elements_latency;
+
     Stats();
 
     void start_frequent_query();
@@ -41,9 +50,9 @@ public:
 
     void end_top_k_query();
 
-    void start_process_element();
+    void start_process_elements(counter n);
 
-    void end_process_element();
+    void end_process_elements();
 
     template<class T>
     void report(std::ostream& stream, GenericAlgorithmInterface<T>* algorithm);
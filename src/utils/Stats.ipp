@@ -1,5 +1,7 @@
 #include <algorithms/GenericAlgorithm.h>
 #include "Stats.h"
+#include "MemoryUsage.h"
+#include "Profiler.h"
 
 
 Stats::Stats() {
@@ -9,6 +11,7 @@ Stats::Stats() {
     top_k_query_count = 0;
     process_element_time = 0;
     process_element_count = 0;
+    batch_size = 0;
 
     initial_time = std::chrono::high_resolution_clock::now();
 }
@@ -22,13 +25,18 @@ void Stats::start_counting() {
     start_time = std::chrono::high_resolution_clock::now();
 }
 
-void Stats::finish_counting(counter& counter) {
-    counter += get_interval(start_time);
+void Stats::finish_counting(counter& counter, LatencyHistogram& latency) {
+    Stats::counter interval = get_interval(start_time);
+    counter += interval;
+    latency.record(interval);
 }
 
-#if __APPLE__
-#include <malloc/malloc.h>
-#endif
+void Stats::report_latency(std::ostream& stream, const std::string& name, const LatencyHistogram& latency) {
+    stream << "'" << name << "_p50': " << latency.get_quantile(0.5) << ",";
+    stream << "'" << name << "_p99': " << latency.get_quantile(0.99) << ",";
+    stream << "'" << name << "_p999': " << latency.get_quantile(0.999) << ",";
+    stream << "'" << name << "_max': " << latency.get_max() << ",";
+}
 
 template<class T>
 void Stats::report(std::ostream& stream, GenericAlgorithmInterface<T>* algorithm) {
@@ -46,11 +54,18 @@ void Stats::report(std::ostream& stream, GenericAlgorithmInterface<T>* algorithm
     stream << "'frequent_query_count': " << frequent_query_count << ",";
     stream << "'top_k_query_time': " << top_k_query_time << ",";
     stream << "'top_k_query_count': " << top_k_query_count << ",";
-#if __APPLE__
-    stream << "'memory_usage': " << mstats().bytes_used;
-#else
-    stream << "'memory_usage': " << -1;
-#endif
+    report_latency(stream, "process_elements_latency", process_elements_latency);
+    report_latency(stream, "frequent_query_latency", frequent_query_latency);
+    report_latency(stream, "top_k_query_latency", top_k_query_latency);
+    std::vector<const Profiler::Profile*> cost_profiles;
+    algorithm->get_cost_profiles(cost_profiles);
+    if(!cost_profiles.empty()) {
+        Profiler::report(stream, cost_profiles);
+    }
+    stream << "'memory_usage': " << MemoryUsage::get_allocated_bytes() << ",";
+    stream << "'peak_memory_usage': " << MemoryUsage::get_peak_allocated_bytes() << ",";
+    stream << "'resident_memory': " << MemoryUsage::get_resident_bytes() << ",";
+    stream << "'peak_resident_memory': " << MemoryUsage::get_peak_resident_bytes();
     stream << "}" << std::endl;
 }
 
@@ -60,7 +75,7 @@ void Stats::start_frequent_query() {
 }
 
 void Stats::end_frequent_query() {
-    finish_counting(frequent_query_time);
+    finish_counting(frequent_query_time, frequent_query_latency);
 }
 
 void Stats::start_top_k_query() {
@@ -69,14 +84,18 @@ void Stats::start_top_k_query() {
 }
 
 void Stats::end_top_k_query() {
-    finish_counting(top_k_query_count);
+    finish_counting(top_k_query_time, top_k_query_latency);
 }
 
-void Stats::start_process_element() {
-    process_element_count++;
+// Elements are timed per batch so the clock overhead doesn't dominate the time per element
+void Stats::start_process_elements(counter n) {
+    process_element_count += n;
+    batch_size = n;
     start_counting();
 }
 
-void Stats::end_process_element() {
-    finish_counting(process_element_time);
+void Stats::end_process_elements() {
+    if(batch_size > 0) { // The empty batches flushed before the commands aren't latencies
+        finish_counting(process_element_time, process_elements_latency);
+    }
 }
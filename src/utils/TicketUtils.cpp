@@ -1,28 +1,124 @@
 #include "TicketUtils.h"
+#include "Snapshot.h"
+#include <cassert>
+#include <cmath>
+#include <sstream>
 
 using namespace std;
 
-TicketUtils::TicketUtils(int seed) {
+TicketUtils::TicketUtils(int seed, bool fast) {
     if(seed == -1) {
         seed = random_device()();
     }
-    random_state = mt19937_64(seed);
-    dist = uniform_int_distribution<Ticket>(0, MAX_TICKET);
+    this->fast = fast;
+    if(fast) {
+        // The state of xoshiro is initialized with splitmix64, as recommended by its authors
+        uint64_t x = (uint64_t) seed;
+        for(int i = 0; i < 4; ++i) {
+            uint64_t z = (x += 0x9e3779b97f4a7c15ULL);
+            z = (z ^ (z >> 30)) * 0xbf58476d1ce4e5b9ULL;
+            z = (z ^ (z >> 27)) * 0x94d049bb133111ebULL;
+            xoshiro_state[i] = z ^ (z >> 31);
+        }
+    } else {
+        random_state = mt19937_64(seed);
+    }
+}
+
+uint64_t TicketUtils::generate_xoshiro() {
+    uint64_t* s = xoshiro_state;
+    uint64_t x = s[0] + s[3];
+    uint64_t result = ((x << 23) | (x >> 41)) + s[0];
+    uint64_t t = s[1] << 17;
+    s[2] ^= s[0];
+    s[3] ^= s[1];
+    s[1] ^= s[2];
+    s[0] ^= s[3];
+    s[2] ^= t;
+    s[3] = (s[3] << 45) | (s[3] >> 19);
+    return result;
+}
+
+void TicketUtils::fill_buffer() {
+    // The uniform distribution over all the tickets is the raw output of the generators
+    if(fast) {
+        for(size_t i = 0; i < BUFFER_SIZE; ++i) {
+            buffer[i] = generate_xoshiro();
+        }
+    } else {
+        for(size_t i = 0; i < BUFFER_SIZE; ++i) {
+            buffer[i] = random_state();
+        }
+    }
+    buffer_pos = 0;
 }
 
-Token TicketUtils::generate_token() {
-    Token token = dist(random_state);
-    return token;
+uint64_t TicketUtils::generate_skip(int leading_ones) {
+    // A token has the leading ones with probability p = 2^-leading_ones
+    return generate_geometric(ldexp(1, -leading_ones));
+}
+
+uint64_t TicketUtils::generate_geometric(double p) {
+    // floor(log(U) / log(1 - p)) with U uniform in (0, 1]
+    if(p >= 1) {
+        return 0;
+    }
+    Profiler::Scope scope(Profiler::TICKET_GENERATION);
+    double u = ((next_token() >> 11) + 1) * 0x1.0p-53;
+    double failures = floor(log(u) / log1p(-p));
+    return !(failures < 0x1.0p64) ? numeric_limits<uint64_t>::max() : (uint64_t) failures; // Also when p underflows
 }
 
 pair<bool, Token> TicketUtils::generate_token(int leading_ones) {
+    Profiler::Scope scope(Profiler::TICKET_GENERATION);
+    if(fast) {
+        if(leading_ones > 0) {
+            if(leading_ones != skip_leading_ones) {
+                // As the trials are independent, the skip can be drawn again when the probability changes
+                skipped_tokens = generate_skip(leading_ones);
+                skip_leading_ones = leading_ones;
+            }
+            if(skipped_tokens > 0) {
+                --skipped_tokens;
+                return pair<bool, Token>(false, 0);
+            }
+            skip_leading_ones = -1;
+        }
+        return pair<bool, Token>(true, next_token());
+    }
     while(leading_ones > 0) {
-        if(dist(random_state) < MAX_TICKET << (64 - min(64, leading_ones))) {
+        if(next_token() < MAX_TICKET << (64 - min(64, leading_ones))) {
             return pair<bool, Token>(false, 0);
         }
         leading_ones -= 64;
     }
-    return pair<bool, Token>(true, dist(random_state));
+    return pair<bool, Token>(true, next_token());
+}
+
+void TicketUtils::save(ostream& stream) const {
+    ostringstream state;
+    state << random_state;
+    Snapshot::write(stream, fast);
+    Snapshot::write_string(stream, state.str());
+    Snapshot::write(stream, xoshiro_state);
+    Snapshot::write(stream, buffer);
+    Snapshot::write(stream, (uint64_t) buffer_pos);
+    Snapshot::write(stream, skipped_tokens);
+    Snapshot::write(stream, skip_leading_ones);
+}
+
+bool TicketUtils::load(istream& stream) {
+    string state;
+    uint64_t position;
+    if(!Snapshot::read(stream, fast) || !Snapshot::read_string(stream, state) || !Snapshot::read(stream, xoshiro_state) ||
+            !Snapshot::read(stream, buffer) || !Snapshot::read(stream, position) || position > BUFFER_SIZE ||
+            !Snapshot::read(stream, skipped_tokens) || !Snapshot::read(stream, skip_leading_ones)) {
+        return false;
+    }
+    buffer_pos = position;
+    istringstream state_stream(state);
+    state_stream >> random_state;
+    return (bool) state_stream;
 }
 
 void TicketUtils::scale_ticket(Ticket& ticket, unsigned int offset) {
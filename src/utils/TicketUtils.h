@@ -2,17 +2,47 @@
 #define _TicketUtils_H_
 
 #include <random>
+#include <cstdint>
+#include <istream>
+#include <ostream>
+#include "Profiler.h"
 
 
 typedef uint64_t Ticket;
 typedef uint64_t Token;
 
+// Tokens are generated in blocks into a buffer. By default they come from mt19937_64. With fast (-fast_rng)
+// they come from xoshiro256++ and the tokens rejected by generate_token(leading_ones) are skipped with
+// a single draw from a geometric distribution. Both are reproducible from the seed.
 class TicketUtils {
 
 private:
 
+    static const size_t BUFFER_SIZE = 128;
+
+    bool fast = false;
     std::mt19937_64 random_state;
-    std::uniform_int_distribution<Ticket> dist;
+    uint64_t xoshiro_state[4] = {0, 0, 0, 0};
+
+    Token buffer[BUFFER_SIZE];
+    size_t buffer_pos = BUFFER_SIZE;
+
+    // Number of calls to generate_token(skip_leading_ones) that will be rejected (fast mode)
+    uint64_t skipped_tokens = 0;
+    int skip_leading_ones = -1;
+
+    void fill_buffer();
+
+    uint64_t generate_xoshiro();
+
+    uint64_t generate_skip(int leading_ones);
+
+    Token next_token() {
+        if(buffer_pos == BUFFER_SIZE) {
+            fill_buffer();
+        }
+        return buffer[buffer_pos++];
+    }
 
 public:
 
@@ -20,12 +50,23 @@ public:
 
     TicketUtils() {}
 
-    TicketUtils(int seed);
+    TicketUtils(int seed, bool fast = false);
 
-    Token generate_token();
+    Token generate_token() {
+        Profiler::Scope scope(Profiler::TICKET_GENERATION);
+        return next_token();
+    }
 
     std::pair<bool, Token> generate_token(int leading_ones);
 
+    // Number of failures before the first success in independent trials with success probability p
+    uint64_t generate_geometric(double p);
+
+    // State of the generator in snapshots
+    void save(std::ostream& stream) const;
+
+    bool load(std::istream& stream);
+
     static void scale_ticket(Ticket& ticket, unsigned int offset);
 
     static int get_leading_ones(const Ticket& ticket);
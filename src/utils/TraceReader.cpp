@@ -0,0 +1,75 @@
+#include "TraceReader.h"
+#include <algorithm>
+#include <cstdlib>
+#include <cstring>
+#include <iostream>
+
+using namespace std;
+
+TraceReader::TraceReader(const string& path) {
+    file = fopen(path.c_str(), "rb");
+    if(file == nullptr) {
+        cerr << "Can't open the trace " << path << endl;
+        exit(1);
+    }
+    char magic[8];
+    uint32_t version;
+    if(fread(magic, 1, 8, file) != 8 || memcmp(magic, "HHTRACE\0", 8) != 0 ||
+            fread(&version, sizeof(uint32_t), 1, file) != 1 || version != VERSION ||
+            fread(&encoding, sizeof(uint32_t), 1, file) != 1 ||
+            fread(&remaining, sizeof(uint64_t), 1, file) != 1) {
+        cerr << "Unknown trace format: " << path << endl;
+        exit(1);
+    }
+    buffer = vector<uint8_t>(1 << 20);
+    buffer_pos = 0;
+    buffer_size = 0;
+    previous = 0;
+}
+
+TraceReader::~TraceReader() {
+    fclose(file);
+}
+
+bool TraceReader::read_byte(uint8_t& byte) {
+    if(buffer_pos == buffer_size) {
+        buffer_size = fread(buffer.data(), 1, buffer.size(), file);
+        buffer_pos = 0;
+        if(buffer_size == 0) {
+            return false;
+        }
+    }
+    byte = buffer[buffer_pos++];
+    return true;
+}
+
+size_t TraceReader::read(int64_t* elements, size_t n) {
+    n = min<uint64_t>(n, remaining);
+    size_t count = 0;
+    if(encoding == RAW) {
+        count = fread(elements, sizeof(int64_t), n, file);
+    } else {
+        uint8_t byte;
+        while(count < n) {
+            uint64_t value = 0;
+            int shift = 0;
+            bool complete = false;
+            while(read_byte(byte)) {
+                value |= uint64_t(byte & 0x7f) << shift;
+                shift += 7;
+                if(byte < 0x80) {
+                    complete = true;
+                    break;
+                }
+            }
+            if(!complete) {
+                break;
+            }
+            uint64_t delta = (value >> 1) ^ (0 - (value & 1)); // zigzag decoding
+            previous = int64_t(uint64_t(previous) + delta);
+            elements[count++] = previous;
+        }
+    }
+    remaining -= count;
+    return count;
+}
@@ -0,0 +1,46 @@
+#ifndef _TraceReader_H_
+#define _TraceReader_H_
+
+#include <cstdint>
+#include <cstdio>
+#include <string>
+#include <vector>
+
+// Reader of the binary trace format written by test/trace_format.py. Little-endian header:
+// magic (8 bytes), version (uint32), encoding (uint32), number of elements (uint64).
+// It is followed by the elements, either as packed int64 (RAW) or as the zigzag encoded
+// differences between consecutive elements written as LEB128 varints (DELTA_VARINT).
+class TraceReader {
+
+private:
+
+    static const uint32_t VERSION = 1;
+
+    FILE* file;
+    uint32_t encoding;
+    uint64_t remaining;
+
+    // Used for the DELTA_VARINT encoding
+    std::vector<uint8_t> buffer;
+    size_t buffer_pos;
+    size_t buffer_size;
+    int64_t previous;
+
+    bool read_byte(uint8_t& byte);
+
+public:
+
+    enum Encoding : uint32_t {
+        RAW = 0,
+        DELTA_VARINT = 1
+    };
+
+    TraceReader(const std::string& path);
+
+    ~TraceReader();
+
+    // Reads at most n elements. Returns the number of elements read (0 at the end of the trace)
+    size_t read(int64_t* elements, size_t n);
+};
+
+#endif //_TraceReader_H_
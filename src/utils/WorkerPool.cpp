@@ -0,0 +1,58 @@
+#include "WorkerPool.h"
+
+using namespace std;
+
+WorkerPool::WorkerPool(unsigned int size) {
+    for(unsigned int i = 1; i < size; ++i) {
+        threads.emplace_back(&WorkerPool::run_worker, this, i);
+    }
+}
+
+WorkerPool::~WorkerPool() {
+    {
+        unique_lock<mutex> guard(lock);
+        stop = true;
+    }
+    task_ready.notify_all();
+    for(auto it = threads.begin(); it != threads.end(); ++it) {
+        it->join();
+    }
+}
+
+void WorkerPool::run_worker(unsigned int worker) {
+    unsigned long long int processed_generation = 0;
+    while(true) {
+        {
+            unique_lock<mutex> guard(lock);
+            task_ready.wait(guard, [&] { return stop || generation != processed_generation; });
+            if(stop) {
+                return;
+            }
+            processed_generation = generation;
+        }
+        task(worker);
+        {
+            unique_lock<mutex> guard(lock);
+            if(--pending == 0) {
+                task_done.notify_one();
+            }
+        }
+    }
+}
+
+void WorkerPool::run(const function<void(unsigned int)>& task) {
+    {
+        unique_lock<mutex> guard(lock);
+        this->task = task;
+        pending = threads.size();
+        ++generation;
+    }
+    task_ready.notify_all();
+    task(0);
+    unique_lock<mutex> guard(lock);
+    task_done.wait(guard, [&] { return pending == 0; });
+}
+
+unsigned int WorkerPool::size() const {
+    return threads.size() + 1;
+}
@@ -0,0 +1,42 @@
+#ifndef _WorkerPool_H_
+#define _WorkerPool_H_
+
+#include <vector>
+#include <thread>
+#include <mutex>
+#include <condition_variable>
+#include <functional>
+
+// Fixed set of threads running the same task over a batch. run(task) calls task(worker) for every
+// worker in [0, size()) in parallel (the calling thread is worker 0) and returns once all have finished.
+class WorkerPool {
+
+private:
+
+    std::vector<std::thread> threads;
+    std::mutex lock;
+    std::condition_variable task_ready;
+    std::condition_variable task_done;
+    std::function<void(unsigned int)> task;
+    unsigned long long int generation = 0;
+    unsigned int pending = 0;
+    bool stop = false;
+
+    void run_worker(unsigned int worker);
+
+public:
+
+    WorkerPool(unsigned int size);
+
+    WorkerPool(const WorkerPool&) = delete;
+
+    WorkerPool& operator=(const WorkerPool&) = delete;
+
+    ~WorkerPool();
+
+    void run(const std::function<void(unsigned int)>& task);
+
+    unsigned int size() const;
+};
+
+#endif //_WorkerPool_H_
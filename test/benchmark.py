@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+import sys
+import os
+import re
+import ast
+import json
+import time
+import atexit
+import shutil
+import subprocess
+import numpy as np
+from datetime import datetime
+from binary_builder import BinaryBuilder
+
+
+# Throughput, query latency and peak memory of the algorithms over a matrix of streams and values of m.
+# The inputs are generated once before running the binaries, so the generators aren't measured. When a baseline
+# commit is given, the same cases are run with its binary and the relative regressions are reported.
+# Usage: benchmark.py config_file [baseline_commit]. The exit code is 1 if there are regressions.
+class Benchmark:
+
+    # Placeholder in the parameters of the algorithms for the value of m
+    M = "$m"
+    # The throughput should grow and the rest of measures decrease
+    MEASURES = ["elements_per_second", "top_k_query_latency", "frequent_query_latency", "top_k_query_latency_p50",
+                "frequent_query_latency_p50", "peak_resident_memory", "peak_memory_usage"]
+
+    def __init__(self, config_file_path, baseline=None):
+        self.config = self.load_config_file(config_file_path)
+        self.algorithms = self.get_algorithms()
+        self.m_values = self.config["m"] if "m" in self.config else [1000]
+        self.length = self.config["length"] if "length" in self.config else 1000000
+        self.repetitions = self.config["repetitions"] if "repetitions" in self.config else 3
+        self.queries = self.config["queries"] if "queries" in self.config else 20
+        self.k = self.config["k"] if "k" in self.config else 100
+        self.freq = self.config["freq"] if "freq" in self.config else 0.001
+        self.threshold = self.config["threshold"] if "threshold" in self.config else 0.1
+        self.seed = self.config["seed"] if "seed" in self.config else 1
+        self.baseline = baseline if baseline is not None else self.config["baseline"] if "baseline" in self.config else None
+        self.folder = ".tmp/benchmark/"
+        self.output = self.config["output"] if "output" in self.config else \
+            "results/benchmark-" + datetime.now().strftime('%Y-%m-%d-%H:%M:%S') + ".json"
+
+
+    def load_config_file(self, config_file_path):
+        with open(config_file_path) as config_file:
+            config_json = ''.join(line for line in config_file if "//" not in line)
+        return json.loads(config_json)
+
+
+    def get_algorithms(self):
+        # All the algorithms registered in create_algorithm_instance unless a subset is chosen
+        with open('../src/algorithms/AlgorithmFactory.h') as f:
+            registered = re.findall(r'get_parameter\("-a"\) == "(\w+)"', f.read())
+        names = self.config["algorithms"] if "algorithms" in self.config else registered
+        missing = [name for name in names if name not in self.config["params"]]
+        if len(missing) > 0:
+            print("Missing parameters for the algorithms:", ', '.join(missing))
+            exit(1)
+        return names
+
+
+    def get_cases(self):
+        for stream in self.config["streams"]:
+            for algorithm in self.algorithms:
+                params = self.config["params"][algorithm]
+                # The algorithms without m in their parameters are run once
+                for m in (self.m_values if Benchmark.M in params.values() else [None]):
+                    yield stream, algorithm, dict([(param, m if value == Benchmark.M else value) for param, value in params.items()]), m
+
+
+    def get_stream_name(self, stream):
+        return stream["name"] + ''.join('-' + param + '=' + str(value) for param, value in sorted(stream["params"].items()))
+
+
+    def generate_input(self, stream):
+        # Text protocol, so older commits can be benchmarked as well
+        path = self.folder + self.get_stream_name(stream) + ".txt"
+        if not os.path.exists(path):
+            params = dict(stream["params"], length=self.length, save=False)
+            if "seed" not in params:
+                params["seed"] = self.seed
+            mod = __import__('streams', fromlist=[stream["name"]])
+            instance = getattr(mod, stream["name"])(**params)
+            with open(path, "w") as f:
+                while True:
+                    block = instance.generate_block(1 << 20)
+                    if len(block) == 0:
+                        break
+                    np.savetxt(f, block, fmt='%d')
+        return path
+
+
+    def run_case(self, exec_path, input_path, algorithm, params):
+        command = [exec_path, '-a', algorithm] + [x for param, value in params.items() for x in ["-" + param, str(value)]]
+        if "seed" not in params:
+            command += ['-seed', str(self.seed)]
+        process = subprocess.Popen(command, bufsize=1, universal_newlines=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        # The throughput is measured from the wall time of processing the whole input (until the reply of :s, which
+        # comes after all the elements), since the time measured by the binary isn't comparable between commits: the
+        # ones before the batched process_elements time every element, including the reads of the clock
+        start = time.perf_counter()
+        with open(input_path) as f:
+            shutil.copyfileobj(f, process.stdin)
+        process.stdin.write(':s\n')
+        process.stdout.readline()
+        elements_time = time.perf_counter() - start
+
+        query_latencies = {"top_k": [], "frequent": []}
+        for i in range(self.queries):
+            for query, command in [("top_k", ':q\n:k\n' + str(self.k) + '\n'), ("frequent", ':q\n:f\n' + str(self.freq) + '\n')]:
+                start = time.perf_counter()
+                process.stdin.write(command)
+                while process.stdout.readline() not in [':end\n', '']:
+                    pass
+                query_latencies[query].append(time.perf_counter() - start)
+        process.stdin.write(':s\n')
+        stats = ast.literal_eval(process.stdout.readline())
+        peak_resident_memory = self.get_peak_resident_memory(process.pid)
+        process.stdin.close()
+        process.wait()
+
+        result = {
+            "elements_per_second": stats["N"] / elements_time,
+            "top_k_query_latency": float(np.median(query_latencies["top_k"])),
+            "frequent_query_latency": float(np.median(query_latencies["frequent"])),
+            "peak_resident_memory": peak_resident_memory
+        }
+        # Measured by the binary when it's supported, without the time of writing the results to the pipe
+        for measure in ["top_k_query_latency_p50", "frequent_query_latency_p50", "peak_memory_usage"]:
+            if measure in stats:
+                result[measure] = stats[measure] * 1e-9 if "latency" in measure else stats[measure]
+        return result
+
+
+    def get_peak_resident_memory(self, pid):
+        # Taken from the kernel while the binary is alive, so it's available for any commit. The peak of the resource
+        # usage (ru_maxrss) can't be used, as it's carried across the fork and exec from the Python process
+        with open('/proc/' + str(pid) + '/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024  # In kB
+        return 0
+
+
+    def run_version(self, commit):
+        exec_path = BinaryBuilder().build(commit)
+        results = []
+        for stream, algorithm, params, m in self.get_cases():
+            input_path = self.generate_input(stream)
+            runs = [self.run_case(exec_path, input_path, algorithm, params) for _ in range(self.repetitions)]
+            # The best run of each measure, as the noise only makes them worse
+            result = dict([(measure, max(run[measure] for run in runs) if measure == "elements_per_second" else
+                            min(run[measure] for run in runs)) for measure in runs[0]])
+            print(commit if commit is not None else "current", self.get_stream_name(stream), algorithm, m, result)
+            results.append({"stream": self.get_stream_name(stream), "algorithm": algorithm, "m": m, "params": params, **result})
+        return results
+
+
+    def compare(self, current, baseline):
+        # Relative change of each measure, the regressions are the changes for the worse above the threshold
+        regressions = []
+        for result, baseline_result in zip(current, baseline):
+            result["baseline"] = dict((measure, baseline_result[measure]) for measure in Benchmark.MEASURES if measure in baseline_result)
+            for measure in Benchmark.MEASURES:
+                if measure not in result or measure not in baseline_result or baseline_result[measure] <= 0:
+                    continue
+                change = result[measure] / baseline_result[measure] - 1
+                if measure == "elements_per_second":
+                    change = -change
+                threshold = self.threshold[measure] if isinstance(self.threshold, dict) else self.threshold
+                if change > threshold:
+                    regressions.append({"stream": result["stream"], "algorithm": result["algorithm"], "m": result["m"],
+                                        "measure": measure, "change": change})
+        return regressions
+
+
+    def run(self):
+        os.makedirs(self.folder, exist_ok=True)
+        BinaryBuilder().build_all([(None, None), (self.baseline, None)] if self.baseline is not None else [(None, None)])
+        report = {"threshold": self.threshold, "baseline": self.baseline, "length": self.length}
+        report["results"] = self.run_version(None)
+        report["regressions"] = []
+        if self.baseline is not None:
+            report["regressions"] = self.compare(report["results"], self.run_version(self.baseline))
+            for regression in report["regressions"]:
+                print("Regression:", regression)
+
+        os.makedirs(os.path.dirname(self.output), exist_ok=True)
+        with open(self.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print("Results written to", self.output)
+        return len(report["regressions"]) == 0
+
+
+def main():
+    atexit.register(lambda: shutil.rmtree(".tmp/", ignore_errors=True))
+
+    benchmark = Benchmark(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
+    exit(0 if benchmark.run() else 1)
+
+if __name__ == '__main__':
+    main()
@@ -1,64 +1,106 @@
 import subprocess
+import hashlib
 import os
 import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 
 class BinaryBuilder():
 
-    _current_version_executable_path = None
-    _older_versions_executable_paths = None
-    _is_repository_freshly_cloned = False
+    # The binaries are cached by the content of the sources (tree hash of src and CMakeLists.txt), the build type
+    # and the compiler flags, so a version is only compiled once no matter the commits or experiments using it
+    cache_path = '../bin/cache/'
+    worktrees_path = '.tmp/worktrees/'
+
+    _lock = threading.Lock()
+    _worktree_lock = threading.Lock()
+    _cache_keys = {}
 
     def build(self, commit=None, profile=None):
-        return '../bin/heavy_hitters'
-        compilation_config = 'release' if profile is None else 'debug'
-        if commit is None:
-            if BinaryBuilder._current_version_executable_path is None:
-                BinaryBuilder._current_version_executable_path = self._build('../', '../bin/', compilation_config, print_output=True)
-            return BinaryBuilder._current_version_executable_path
-        else:
-            if BinaryBuilder._older_versions_executable_paths is None:
-                BinaryBuilder._older_versions_executable_paths = {}
-                if os.path.exists('../bin/'):
-                    for binary_file in os.listdir('../bin/'):
-                        if len(binary_file.split('-')) == 2:
-                            BinaryBuilder._older_versions_executable_paths[binary_file.split('-')[1]] = '../bin/' + binary_file
-
-            if commit in BinaryBuilder._older_versions_executable_paths:
-                return BinaryBuilder._older_versions_executable_paths[commit]
-
-            if not self._is_repository_freshly_cloned:
-                self._clone_repository('.tmp/old_version/')
-                self._is_repository_freshly_cloned = True
-
-            self._git_checkout('.tmp/old_version/', commit)
-            binary_path = self._build('.tmp/old_version/', '../bin/', compilation_config, suffix='-' + commit)
-            BinaryBuilder._older_versions_executable_paths[commit] = binary_path
-            return binary_path
-
-
-    def _build(self, path, output_path, compilation_config, suffix='', print_output=False):
-        build_path = path + 'cmake-build-' + compilation_config
-        os.makedirs(build_path, exist_ok=True)
-        self._run_command('cd ' + build_path + ' && cmake -DCMAKE_BUILD_TYPE=' + compilation_config + ' .. && make', print_output)
-        binary_path = output_path + 'heavy_hitters' + suffix
-        os.makedirs(output_path, exist_ok=True)
-        shutil.copy2(build_path + '/heavy_hitters', binary_path)
-        return binary_path
+        return self.build_all([(commit, profile)])[0]
+
+
+    def build_binding(self):
+        # The library of the in-process backend (native_binding.py) is only built from the current version
+        return self.build_all([(None, None)], target='heavy_hitters_binding', file_name='heavy_hitters_binding.so')[0]
+
+
+    def build_all(self, versions, target='heavy_hitters', file_name='heavy_hitters'):
+        # Builds in parallel the (commit, profile) versions that aren't cached yet, returns their paths in order
+        keys = [self._get_cache_key(commit, self._get_compilation_config(profile), file_name) for commit, profile in versions]
+        name, extension = os.path.splitext(file_name)
+        paths = [BinaryBuilder.cache_path + name + '-' + key + extension for key in keys]
+        missing = {}
+        for (commit, profile), path in zip(versions, paths):
+            if not os.path.exists(path) and path not in missing:
+                missing[path] = (commit, self._get_compilation_config(profile))
+        if len(missing) > 0:
+            os.makedirs(BinaryBuilder.cache_path, exist_ok=True)
+            jobs = max(1, (os.cpu_count() or 1) // len(missing))
+            with BinaryBuilder._lock, ThreadPoolExecutor(max_workers=len(missing)) as pool:
+                builds = [pool.submit(self._build, commit, compilation_config, target, file_name, path, jobs)
+                          for path, (commit, compilation_config) in missing.items()]
+                for build in builds:
+                    build.result()
+        return paths
+
 
+    def _get_compilation_config(self, profile):
+        return 'release' if profile is None else 'debug'
 
-    def _clone_repository(self, path):
-        if os.path.isdir(path):
-            shutil.rmtree(path)
-        os.makedirs(path)
-        shutil.copytree('../.git', path + '.git')
-        self._run_command('cd ' + path + ' && git checkout .', False)
 
+    def _get_cache_key(self, commit, compilation_config, file_name):
+        key = (commit, compilation_config, file_name)
+        if key not in BinaryBuilder._cache_keys or commit is None:  # The working tree can change between builds
+            if commit is None:
+                sources = self._hash_working_tree()
+            else:
+                sources = self._run_command('git rev-parse ' + commit + ':src ' + commit + ':CMakeLists.txt', False)
+            flags = ' '.join(os.environ.get(variable, '') for variable in ['CXX', 'CXXFLAGS', 'LDFLAGS'])
+            BinaryBuilder._cache_keys[key] = hashlib.sha1((sources + compilation_config + flags).encode()).hexdigest()[:16]
+        return BinaryBuilder._cache_keys[key]
 
-    def _git_checkout(self, path, commit):
-        self._run_command('cd ' + path + ' && git checkout ' + commit, False)
+
+    def _hash_working_tree(self):
+        sources = hashlib.sha1()
+        paths = ['../CMakeLists.txt'] + sorted(os.path.join(folder, file) for folder, _, files in os.walk('../src') for file in files)
+        for path in paths:
+            sources.update(path.encode())
+            with open(path, 'rb') as f:
+                sources.update(f.read())
+        return sources.hexdigest()
+
+
+    def _build(self, commit, compilation_config, target, file_name, output_path, jobs):
+        if commit is None:
+            self._make('../', compilation_config, target, file_name, output_path, jobs)
+            return
+        # A worktree of the commit, without copying the repository
+        path = BinaryBuilder.worktrees_path + os.path.splitext(output_path)[0].split('-')[-1] + '/'
+        with BinaryBuilder._worktree_lock:  # git locks its metadata while adding or removing worktrees
+            if os.path.isdir(path):
+                self._run_command('git worktree remove --force ' + path, False)
+            self._run_command('git worktree add --detach ' + path + ' ' + commit, False)
+        try:
+            self._make(path, compilation_config, target, file_name, output_path, jobs)
+        finally:
+            with BinaryBuilder._worktree_lock:
+                self._run_command('git worktree remove --force ' + path, False)
+
+
+    def _make(self, path, compilation_config, target, file_name, output_path, jobs):
+        build_path = path + 'cmake-build-' + compilation_config
+        os.makedirs(build_path, exist_ok=True)
+        self._run_command('cd ' + build_path + ' && cmake -DCMAKE_BUILD_TYPE=' + compilation_config + ' .. && make -j' +
+                          str(jobs) + ' ' + target, path == '../')
+        # Copied and renamed, so an interrupted build doesn't leave an incomplete binary in the cache
+        shutil.copy2(build_path + '/' + file_name, output_path + '.tmp')
+        os.replace(output_path + '.tmp', output_path)
 
 
     def _run_command(self, command, print_output):
-        pipe = None if print_output else subprocess.DEVNULL
-        assert(subprocess.call(command, stdout=pipe, stderr=pipe, shell=True) == 0)
\ No newline at end of file
+        pipe = None if print_output else subprocess.PIPE
+        process = subprocess.run(command, stdout=pipe, stderr=pipe, shell=True, universal_newlines=True)
+        assert(process.returncode == 0)
+        return process.stdout.replace('\n', '') if process.stdout is not None else ''
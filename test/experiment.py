@@ -1,7 +1,10 @@
 import json
 import copy
+import random
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 from streams import chunk_stream
 from instance import Instance
+from binary_builder import BinaryBuilder
 from metrics_builder import MetricsBuilder
 
 
@@ -35,6 +38,13 @@ class Experiment:
                     print("Iterating over more than one parameter is not possible.")
                     exit(1)
 
+        # The metrics of the built-in cost profiler (e.g. "cost_process_element_cycles") are collected in the same pass
+        # as the rest of metrics, profiling one of every cost_profile elements
+        metric_names = [name for metric in self.config["metrics"] for name in (metric if isinstance(metric, list) else [metric])]
+        self.cost_profile = None
+        if any(name.startswith("cost_") for name in metric_names):
+            self.cost_profile = self.config["cost_profile"] if "cost_profile" in self.config else 1024
+
         self.profile = None
         for metric in self.config["metrics"]:
             if metric in ["memory_usage_profiler", "memory_leak_profiler", "average_cost_profiler"]:
@@ -46,6 +56,11 @@ class Experiment:
         if "save" not in self.config["stream"]["params"]:
             self.config["stream"]["params"]["save"] = False
 
+        self.concurrent = self.config["concurrent"] if "concurrent" in self.config else False
+        self.workers = self.config["workers"] if "workers" in self.config else 1
+        self.fsync = self.config["fsync"] if "fsync" in self.config else "end"
+        self.npz = self.config["npz"] if "npz" in self.config else False
+
 
     def load_config_file(self, config_file_path):
         with open(config_file_path) as config_file:
@@ -61,62 +76,127 @@ class Experiment:
         return self.config["seed"] if "seed" in self.config else random.randrange(10000000)
 
 
-    def create_instances(self, iteration):
+    def draw_seeds(self):
+        # Drawn by the main process before running the iteration, as the forked workers of the pool would all start
+        # with the same random state
+        return {"algorithms": [self.get_random_seed() for _ in self.config["algorithms"]], "stream": self.get_random_seed()}
+
+
+    def create_instances(self, iteration, seeds):
         print("Building binaries and instantiating algorithms")
         instances = []
-        for algorithm in self.config["algorithms"]:
+        for algorithm, seed in zip(self.config["algorithms"], seeds["algorithms"]):
             params = copy.deepcopy(algorithm["params"])
             if self.iterating_over is not None and self.iterating_over[0] == "algorithms":
                 params[self.iterating_over[1]] = params[self.iterating_over[1]][iteration]
             if "seed" not in params:
-                params["seed"] = self.get_random_seed()
+                params["seed"] = seed
+            if self.cost_profile is not None:
+                params["cost_profile"] = self.cost_profile
             commit = algorithm["commit"] if "commit" in algorithm else None
-            instances.append(Instance(algorithm["name"], params, commit=commit, profile=self.profile))
+            binary = algorithm["binary"] if "binary" in algorithm else False
+            native = algorithm["native"] if "native" in algorithm else False
+            instances.append(Instance(algorithm["name"], params, commit=commit, profile=self.profile, binary=binary, native=native))
         return instances
 
 
-    def create_stream(self, iteration):
+    def build_binaries(self):
+        # All the versions are compiled in parallel before the run, the ones in the cache are skipped
+        versions = [(algorithm["commit"] if "commit" in algorithm else None, self.profile)
+                    for algorithm in self.config["algorithms"] if not ("native" in algorithm and algorithm["native"])]
+        if len(versions) > 0:
+            BinaryBuilder().build_all(versions)
+        if len(versions) < len(self.config["algorithms"]):
+            BinaryBuilder().build_binding()
+
+
+    def create_stream(self, iteration, seeds):
         stream_name = self.config["stream"]["name"]
         params = copy.deepcopy(self.config["stream"]["params"])
         if self.iterating_over is not None and self.iterating_over[0] == "stream":
             params[self.iterating_over[1]] = params[self.iterating_over[1]][iteration]
         if "seed" not in params:
-            params["seed"] = self.get_random_seed()
+            params["seed"] = seeds["stream"]
         mod = __import__('streams', fromlist=[stream_name])
         return getattr(mod, stream_name)(**params)
 
 
-    def run(self):
-        metrics = MetricsBuilder("N" if self.iterating_over is None else self.iterating_over[1], self.config["metrics"])
+    def process_chunk(self, instances, stream, chunk, executor):
+        if executor is None:
+            for instance in instances:
+                instance.process_stream_chunk(chunk)
+            stream.record_block(chunk)
+        else:
+            # The chunk is written to all the instances at the same time while the real frequencies are updated
+            writes = [executor.submit(instance.process_stream_chunk, chunk) for instance in instances]
+            stream.record_block(chunk)
+            for write in writes:
+                write.result()
 
-        for iteration in range(0, self.iterations):
-            print('Iteration:', iteration + 1, '/', self.iterations)
 
-            instances = self.create_instances(iteration)
-            stream = self.create_stream(iteration)
+    def create_executor(self):
+        return ThreadPoolExecutor(max_workers=len(self.config["algorithms"])) if self.concurrent else None
 
-            for chunk in chunk_stream(stream, stream.length // 100):
-                for instance in instances:
-                    instance.process_stream_chunk(chunk)
-                print(round(stream.N * 100 / stream.length, 2), '%')
-                if self.iterating_over is None:
-                    metrics.capture(stream.N, instances, stream, self.config)
-                    metrics.save(self.config_json, finished=False)
 
-            if self.profile is not None:
-                for instance in instances:
-                    instance.finish()
+    def run_iteration(self, iteration, seeds, metrics, executor):
+        print('Iteration:', iteration + 1, '/', self.iterations)
 
-            if self.iterating_over is not None:
-                if self.iterating_over[0] == "algorithms":
-                    x = next(iter(self.config["algorithms"]))["params"][self.iterating_over[1]][iteration]
-                else:
-                    x = self.config["stream"]["params"][self.iterating_over[1]][iteration]
-                metrics.capture(x, instances, stream, self.config)
-                metrics.save(self.config_json, finished=False)
+        instances = self.create_instances(iteration, seeds)
+        stream = self.create_stream(iteration, seeds)
 
-            if self.profile is None:
-                for instance in instances:
-                    instance.finish()
+        for chunk in chunk_stream(stream, stream.length // 100, record=False):
+            self.process_chunk(instances, stream, chunk, executor)
+            print(round(stream.N * 100 / stream.length, 2), '%')
+            if self.iterating_over is None:
+                metrics.capture(stream.N, instances, stream, self.config)
+                metrics.save()
 
-        metrics.save(self.config_json, finished=True)
\ No newline at end of file
+        if self.profile is not None:
+            for instance in instances:
+                instance.finish()
+
+        if self.iterating_over is not None:
+            if self.iterating_over[0] == "algorithms":
+                x = next(iter(self.config["algorithms"]))["params"][self.iterating_over[1]][iteration]
+            else:
+                x = self.config["stream"]["params"][self.iterating_over[1]][iteration]
+            metrics.capture(x, instances, stream, self.config)
+
+        if self.profile is None:
+            for instance in instances:
+                instance.finish()
+
+
+    def run_sweep_iteration(self, iteration, seeds):
+        # Executed in a worker process. The captured row is merged afterwards by the main process
+        metrics = MetricsBuilder(self.iterating_over[1], self.config["metrics"])
+        executor = self.create_executor()
+        self.run_iteration(iteration, seeds, metrics, executor)
+        if executor is not None:
+            executor.shutdown()
+        return metrics
+
+
+    def run(self):
+        metrics = MetricsBuilder("N" if self.iterating_over is None else self.iterating_over[1], self.config["metrics"],
+                                 fsync=self.fsync, npz=self.npz)
+        metrics.start(self.config_json)
+        self.build_binaries()
+
+        if self.workers > 1 and self.iterating_over is not None:
+            seeds = [self.draw_seeds() for _ in range(0, self.iterations)]
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                # map returns the results in the order of the iterations
+                for iteration_metrics in pool.map(self.run_sweep_iteration, range(0, self.iterations), seeds):
+                    metrics.merge(iteration_metrics)
+                    metrics.save()
+        else:
+            executor = self.create_executor()
+            for iteration in range(0, self.iterations):
+                self.run_iteration(iteration, self.draw_seeds(), metrics, executor)
+                if self.iterating_over is not None:
+                    metrics.save()
+            if executor is not None:
+                executor.shutdown()
+
+        metrics.finish()
\ No newline at end of file
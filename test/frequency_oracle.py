@@ -0,0 +1,97 @@
+import math
+import numpy as np
+
+
+class FrequencyOracle:
+    # Exact frequencies of the elements of a stream. The distinct elements are kept sorted
+    # in a numpy array (so they can be found with a binary search) and their counts in another one.
+
+    def __init__(self):
+        self.ids = np.empty(0, dtype=np.int64)
+        self.counts = np.empty(0, dtype=np.int64)
+        self.N = 0
+
+
+    def __getitem__(self, id):
+        key = self.to_key(id)
+        position = np.searchsorted(self.ids, key)
+        if position == len(self.ids) or self.ids[position] != key:
+            raise KeyError(id)
+        return self.counts[position] / self.N
+
+
+    def to_key(self, id):
+        # The id converted to the type of the ids. Ids that don't fit in it can't be in the oracle, so they aren't
+        # converted (e.g. strings longer than the fixed width ones would be truncated and match the wrong id)
+        id = np.asarray(id)
+        if self.ids.dtype.kind in 'US':
+            key = id.astype(self.ids.dtype.kind)  # As wide as needed
+            width = self.ids.dtype.itemsize // np.dtype(self.ids.dtype.kind + '1').itemsize
+            if len(key.item()) > width:
+                raise KeyError(id.item())
+            return key
+        try:
+            key = id.astype(self.ids.dtype)
+        except (OverflowError, ValueError):
+            raise KeyError(id.item())
+        if id.dtype.kind in 'iuf' and key != id:  # Out of range or not integral
+            raise KeyError(id.item())
+        return key
+
+
+    def process_elements(self, elements):
+        if len(elements) == 0:
+            return
+        self.N += len(elements)
+        block_ids, block_counts = np.unique(elements, return_counts=True)
+        if len(self.ids) == 0:
+            self.ids, self.counts = block_ids, block_counts.astype(np.int64)
+            return
+
+        positions = np.searchsorted(self.ids, block_ids)
+        found = positions < len(self.ids)
+        found[found] = self.ids[positions[found]] == block_ids[found]
+        self.counts[positions[found]] += block_counts[found]
+
+        # New elements are merged keeping the ids sorted
+        new_ids = block_ids[~found]
+        if len(new_ids) > 0:
+            new_positions = positions[~found] + np.arange(len(new_ids))
+            is_new = np.zeros(len(self.ids) + len(new_ids), dtype=bool)
+            is_new[new_positions] = True
+            ids = np.empty(len(is_new), dtype=np.result_type(self.ids, new_ids))
+            ids[is_new] = new_ids
+            ids[~is_new] = self.ids
+            counts = np.empty(len(is_new), dtype=np.int64)
+            counts[is_new] = block_counts[~found]
+            counts[~is_new] = self.counts
+            self.ids, self.counts = ids, counts
+
+
+    def top_k_query(self, k):
+        k = min(int(k), len(self.ids))
+        if k == 0:
+            return []
+        if k < len(self.ids):
+            # Partial selection of the k-th count. The ties in it are broken by id (ids are sorted)
+            kth_count = -np.partition(-self.counts, k - 1)[k - 1]
+            above = np.flatnonzero(self.counts > kth_count)
+            ties = np.flatnonzero(self.counts == kth_count)[:k - len(above)]
+            positions = np.concatenate((above, ties))
+        else:
+            positions = np.arange(len(self.ids))
+        return self.sorted_results(positions)
+
+
+    def frequent_query(self, freq):
+        return self.sorted_results(np.flatnonzero(self.counts >= math.ceil(freq * self.N)))
+
+
+    def sorted_results(self, positions):
+        # Sorted by decreasing count (ties by id)
+        positions = positions[np.lexsort((self.ids[positions], -self.counts[positions]))]
+        return list(zip(self.ids[positions].tolist(), self.counts[positions].tolist()))
+
+
+    def size(self):
+        return len(self.ids)
@@ -1,19 +1,44 @@
 import subprocess
 import ast
+import struct
 import time
+import numpy as np
 import profiler_utils
 from binary_builder import BinaryBuilder
+from native_binding import create_algorithm_instance
+
+
+# Frame types of the binary protocol (see src/utils/BinaryProtocol.h)
+ELEMENTS = 0
+FREQUENT_QUERY = 1
+TOP_K_QUERY = 2
+STATS = 3
+END = 4
+QUERY_RESULTS = 5
+HEADER = struct.Struct('<qq')
 
 
 class Instance:
 
-    def __init__(self, algorithm, params, commit=None, profile=None):
+    def __init__(self, algorithm, params, commit=None, profile=None, binary=False, native=False):
         self.algorithm = algorithm
         self.params = params
         self.params["a"] = algorithm
+        self.profile = profile
+        self.finished = False
+        self.N = 0
+        # native: the algorithm runs inside this process (the profilers and the old commits need a subprocess)
+        self.native = None
+        if native:
+            assert(commit is None and profile is None)
+            self.native = create_algorithm_instance(algorithm, params)
+            return
+
         exec_path = BinaryBuilder().build(commit, profile)
 
         command = [exec_path] + [x for param, value in params.items() for x in ["-" + param, str(value)]]
+        if binary:
+            command.append('-binary')
         error_pipe = None
         if profile is not None:
             if profile == 'memory_usage_profiler':
@@ -27,20 +52,48 @@ class Instance:
                 exit(1)
             command = ['valgrind', '--tool=' + tool, '--' + tool + '-out-file=.tmp/' + tool + '.out.%p'] + command
             error_pipe = subprocess.PIPE
-        self.profile = profile
+        self.binary = binary
         self.command = ' '.join(command)
-        self.process = subprocess.Popen(command, bufsize=1, universal_newlines=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=error_pipe)
+        if binary:
+            self.process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=error_pipe)
+        else:
+            self.process = subprocess.Popen(command, bufsize=1, universal_newlines=True, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=error_pipe)
         self.pid = self.process.pid
-        self.finished = False
-        self.N = 0
+
+
+    def write_frame(self, frame_type, payload=b''):
+        self.process.stdin.write(HEADER.pack(frame_type, len(payload)))
+        self.process.stdin.write(payload)
+        self.process.stdin.flush()
+
+
+    def read_frame(self, frame_type):
+        header = self.process.stdout.read(HEADER.size)
+        if len(header) < HEADER.size:
+            print("Error reading frame from instance")
+            exit(1)
+        received_type, size = HEADER.unpack(header)
+        assert(received_type == frame_type)
+        return self.process.stdout.read(size)
 
 
     def process_stream_chunk(self, elements):
         self.N += len(elements)
-        self.process.stdin.write('\n'.join(str(element) for element in elements) + '\n')
+        if self.native is not None:
+            self.native.process_elements(elements)
+        elif self.binary:
+            self.write_frame(ELEMENTS, memoryview(np.ascontiguousarray(elements, dtype='<i8')).cast('B'))
+        else:
+            self.process.stdin.write('\n'.join(map(str, elements.tolist())) + '\n')
+
+
+    def query_results_to_list(self, results):
+        return [(str(element), count / float(self.N)) for element, count in results.tolist()]
 
 
     def process_query_output(self):
+        if self.binary:
+            return self.query_results_to_list(np.frombuffer(self.read_frame(QUERY_RESULTS), dtype='<i8').reshape(-1, 2))
         elements = []
         while True:
             output = self.process.stdout.readline()
@@ -57,24 +110,42 @@ class Instance:
 
 
     def frequent_query(self, freq):
-        command = ':q' + '\n' + ':f' + '\n' + str(freq) + '\n'
-        self.process.stdin.write(command)
+        if self.native is not None:
+            return self.query_results_to_list(self.native.frequent_query(freq))
+        if self.binary:
+            self.write_frame(FREQUENT_QUERY, struct.pack('<d', freq))
+        else:
+            command = ':q' + '\n' + ':f' + '\n' + str(freq) + '\n'
+            self.process.stdin.write(command)
 
         return self.process_query_output()
 
 
     def top_k_query(self, k):
-        command = ':q' + '\n' + ':k' + '\n' + str(int(k)) + '\n'
-        self.process.stdin.write(command)
+        if self.native is not None:
+            return self.query_results_to_list(self.native.top_k_query(k))
+        if self.binary:
+            self.write_frame(TOP_K_QUERY, struct.pack('<q', int(k)))
+        else:
+            command = ':q' + '\n' + ':k' + '\n' + str(int(k)) + '\n'
+            self.process.stdin.write(command)
 
         return self.process_query_output()
 
 
     def get_stats(self):
-        if self.process.poll() is not None or self.finished:
+        if self.finished:
+            return self.end_stats
+        if self.native is not None:
+            return self.native.get_stats()
+        if self.process.poll() is not None:
             return self.end_stats
-        self.process.stdin.write(':s\n')
-        output = self.process.stdout.readline()
+        if self.binary:
+            self.write_frame(STATS)
+            output = self.read_frame(STATS).decode()
+        else:
+            self.process.stdin.write(':s\n')
+            output = self.process.stdout.readline()
         return ast.literal_eval(output)
 
 
@@ -92,6 +163,12 @@ class Instance:
         if self.finished:
             return
         self.end_stats = self.get_stats()
+        if self.native is not None:
+            self.native.close()
+            self.finished = True
+            return
+        if self.binary:
+            self.write_frame(END)
         self.process.stdin.close()
         self.finished = True
         if self.profile is not None:
@@ -4,16 +4,51 @@ from datetime import datetime
 import accuracy_metrics
 
 
+class QueryCache:
+    # Wraps an instance or a stream so each query and stats request is computed only once
+    # for a given N, no matter how many metrics use it.
+
+    cached_methods = {'top_k_query', 'frequent_query', 'get_stats'}
+
+    def __init__(self, target):
+        self.target = target
+        self.results = {}
+
+
+    def __getattr__(self, name):
+        attribute = getattr(self.target, name)
+        if name not in QueryCache.cached_methods:
+            return attribute
+
+        def cached_method(*args):
+            key = (name, self.target.N) + args
+            if key not in self.results:
+                self.results[key] = attribute(*args)
+            return self.results[key]
+        return cached_method
+
+
 class MetricsBuilder:
 
-    def __init__(self, x_name, metrics):
+    # Quantiles reported by the instances for every latency histogram (e.g. "top_k_query_latency")
+    latency_quantiles = ["p50", "p99", "p999", "max"]
+
+    def __init__(self, x_name, metrics, fsync="end", npz=False):
         self.x = []
         self.y = dict([(metric, []) for metric in [(metric,) if type(metric) != list else tuple(metric) for metric in metrics]])
         self.start_time = datetime.now()
         self.x_name = x_name
+        # "checkpoint": the csv files are synced to disk at every save, "end": only when finished, "never"
+        self.fsync = fsync
+        self.npz = npz
+        self.folder = "results/" + self.start_time.strftime('%Y-%m-%d-%H:%M:%S') + "/"
+        self.files = {}
+        self.saved_rows = 0
 
 
     def capture(self, x_value, instances, stream, config):
+        instances = [QueryCache(instance) for instance in instances]
+        stream = QueryCache(stream)
         for metric_group, data_lines in self.y.items():
 
             index = 0
@@ -40,22 +75,57 @@ class MetricsBuilder:
                         else:
                             stats = instance.get_stats()
                             if metric in stats:
-                                add_value(name, instance.get_stats()[metric])
+                                add_value(name, stats[metric])
+                            elif metric + "_" + MetricsBuilder.latency_quantiles[0] in stats:  # One line per quantile
+                                for quantile in MetricsBuilder.latency_quantiles:
+                                    add_value(name + " " + quantile, stats[metric + "_" + quantile])
         self.x.append(x_value)
 
 
-    def save(self, config_json, finished=True):
-        folder = "results/" + self.start_time.strftime('%Y-%m-%d-%H:%M:%S') + "/"
-        os.makedirs(folder, exist_ok=True)
+    def merge(self, metrics):
+        # Appends the rows captured by another MetricsBuilder (e.g. from a worker process)
+        for metric_group, data_lines in metrics.y.items():
+            if len(self.x) == 0:
+                self.y[metric_group].extend((line_name, []) for line_name, _ in data_lines)
+            for (_, data), (_, new_data) in zip(self.y[metric_group], data_lines):
+                data.extend(new_data)
+        self.x.extend(metrics.x)
 
-        for metric_group, data_lines in self.y.items():
-            filename = folder + metric_group[0] + ".csv"
-            table = np.flip(np.rot90(np.array([self.x] + [data for _, data in data_lines]), axes=(1, 0)), axis=1)
-            np.savetxt(filename, table, header=','.join([self.x_name] + [name for name, _ in data_lines]), comments='', delimiter=',')
 
-        unfinished_experiment_config_file = folder + "unfinished_config_file.json"
-        finished_experiment_config_file = folder + "config_file.json"
-        with open(finished_experiment_config_file if finished else unfinished_experiment_config_file, "w") as config_file:
+    def start(self, config_json):
+        os.makedirs(self.folder, exist_ok=True)
+        with open(self.folder + "unfinished_config_file.json", "w") as config_file:
             config_file.writelines(config_json)
-        if os.path.isfile(unfinished_experiment_config_file) and finished:
-            os.remove(unfinished_experiment_config_file)
+
+
+    def save(self):
+        # Only the rows captured since the last call are appended to the csv files
+        if len(self.x) == self.saved_rows:
+            return
+        for metric_group, data_lines in self.y.items():
+            if metric_group not in self.files:
+                self.files[metric_group] = open(self.folder + metric_group[0] + ".csv", "w")
+                self.files[metric_group].write(','.join([self.x_name] + [name for name, _ in data_lines]) + '\n')
+            file = self.files[metric_group]
+            for row in range(self.saved_rows, len(self.x)):
+                file.write(','.join('%.18e' % value for value in [self.x[row]] + [data[row] for _, data in data_lines]) + '\n')
+            file.flush()
+            if self.fsync == "checkpoint":
+                os.fsync(file.fileno())
+        self.saved_rows = len(self.x)
+
+
+    def finish(self):
+        self.save()
+        for file in self.files.values():
+            if self.fsync == "end":
+                os.fsync(file.fileno())
+            file.close()
+        self.files = {}
+
+        if self.npz:  # One array per column, so a single series can be loaded without parsing the csv
+            for metric_group, data_lines in self.y.items():
+                columns = dict([(self.x_name, self.x)] + [(name, data) for name, data in data_lines])
+                np.savez(self.folder + metric_group[0] + ".npz", **columns)
+
+        os.replace(self.folder + "unfinished_config_file.json", self.folder + "config_file.json")
@@ -0,0 +1,75 @@
+import ast
+import ctypes
+import numpy as np
+from binary_builder import BinaryBuilder
+
+
+# In-process backend: the algorithms are run through the C API of the heavy_hitters_binding library (src/Binding.cpp)
+_library = None
+
+
+def _load_library():
+    global _library
+    if _library is None:
+        _library = ctypes.CDLL(BinaryBuilder().build_binding())
+        _library.create_algorithm_instance.restype = ctypes.c_void_p
+        _library.create_algorithm_instance.argtypes = [ctypes.c_int, ctypes.POINTER(ctypes.c_char_p)]
+        _library.destroy_algorithm_instance.argtypes = [ctypes.c_void_p]
+        _library.process_elements.argtypes = [ctypes.c_void_p, ctypes.c_void_p, ctypes.c_size_t]
+        _library.frequent_query.restype = ctypes.c_size_t
+        _library.frequent_query.argtypes = [ctypes.c_void_p, ctypes.c_double]
+        _library.top_k_query.restype = ctypes.c_size_t
+        _library.top_k_query.argtypes = [ctypes.c_void_p, ctypes.c_int64]
+        _library.query_results.restype = ctypes.POINTER(ctypes.c_int64)
+        _library.query_results.argtypes = [ctypes.c_void_p]
+        _library.get_stats.restype = ctypes.c_char_p
+        _library.get_stats.argtypes = [ctypes.c_void_p]
+    return _library
+
+
+def create_algorithm_instance(algorithm, params):
+    # Same parameters as the command line of the binary (e.g. {"m": 1000, "seed": 1}), without the dashes
+    return NativeAlgorithm(algorithm, params)
+
+
+class NativeAlgorithm:
+
+    def __init__(self, algorithm, params):
+        library = _load_library()
+        args = ["heavy_hitters", "-a", algorithm] + [x for param, value in params.items() if param != "a"
+                                                     for x in ["-" + param, str(value)]]
+        self.args = (ctypes.c_char_p * len(args))(*[arg.encode() for arg in args])
+        self.handle = library.create_algorithm_instance(len(args), self.args)
+        if self.handle is None:
+            raise ValueError("Incorrect parameters for " + algorithm + ": " + str(params))
+
+
+    def process_elements(self, elements):
+        # The array is read in place when it's already a contiguous array of int64
+        elements = np.ascontiguousarray(elements, dtype=np.int64)
+        _library.process_elements(self.handle, elements.ctypes.data, len(elements))
+
+
+    def query_results(self, size):
+        # Rows of (element, count). The results are copied since the library reuses its buffer in the next query
+        if size == 0:
+            return np.empty((0, 2), dtype=np.int64)
+        return np.ctypeslib.as_array(_library.query_results(self.handle), shape=(size, 2)).copy()
+
+
+    def frequent_query(self, freq):
+        return self.query_results(_library.frequent_query(self.handle, freq))
+
+
+    def top_k_query(self, k):
+        return self.query_results(_library.top_k_query(self.handle, int(k)))
+
+
+    def get_stats(self):
+        return ast.literal_eval(_library.get_stats(self.handle).decode())
+
+
+    def close(self):
+        if self.handle is not None:
+            _library.destroy_algorithm_instance(self.handle)
+            self.handle = None
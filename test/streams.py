@@ -1,9 +1,11 @@
 import itertools
 import math
+import os
 import numpy as np
 from abc import abstractmethod
 from io import TextIOWrapper
-from sorted_list import SortedList
+from frequency_oracle import FrequencyOracle
+import trace_format
 
 
 class Stream():
@@ -13,7 +15,7 @@ class Stream():
         self.N = 0
         self.n = 0
         self.save = save
-        self.elements = SortedList()
+        self.elements = FrequencyOracle()
 
 
     def __iter__(self):
@@ -21,33 +23,56 @@ class Stream():
 
 
     def __next__(self):
-        self.N += 1
-        if self.N > self.length:
+        block = self.next_block(1)
+        if len(block) == 0:
             raise StopIteration
-        element = self.next_element()
+        return block[0]
+
+
+    def next_block(self, size):
+        # Returns a numpy array with the next (at most) size elements of the stream
+        block = self.generate_block(size)
+        self.record_block(block)
+        return block
+
+
+    def generate_block(self, size):
+        # Same as next_block but without recording the elements. record_block must be called afterwards
+        size = int(min(size, self.length - self.N))
+        if size <= 0:
+            return np.empty(0, dtype=np.int64)
+        block = self.next_elements(size)
+        self.N += len(block)
+        return block
+
+
+    def record_block(self, block):
         if self.save:  # To speed-up tests in which it is not necessary to check accuracy
-            self.elements.process_element(element)
+            self.elements.process_elements(block)
             self.n = self.elements.size()
-        return element
+
+
+    def positions(self, size):
+        # 1-indexed positions in the stream of the next size elements
+        return np.arange(self.N + 1, self.N + size + 1, dtype=np.int64)
 
 
     @abstractmethod
-    def next_element(self):
+    def next_elements(self, size):
         pass
 
 
     def top_k_query(self, k):
-        return [(str(id), count/self.N) for id, count in itertools.islice(iter(self.elements), k)]
+        return [(str(id), count/self.N) for id, count in self.elements.top_k_query(k)]
 
 
     def frequent_query(self, freq):
-        return [(str(id), count/self.N) for id, count in itertools.takewhile(lambda element: element[1] >= math.ceil(freq * self.N), iter(self.elements))]
+        return [(str(id), count/self.N) for id, count in self.elements.frequent_query(freq)]
 
 
-def chunk_stream(stream, chunk_size):
-    it = iter(stream)
+def chunk_stream(stream, chunk_size, record=True):
     while True:
-        chunk = list(itertools.islice(it, chunk_size))
+        chunk = stream.next_block(chunk_size) if record else stream.generate_block(chunk_size)
         if len(chunk) > 0:
             yield chunk
         else:
@@ -64,10 +89,10 @@ class MultiZipf(Stream):
         np.random.seed(seed)
 
 
-    def next_element(self):
-        element = np.random.zipf(self.alpha)
-        element += self.offset * (self.N // (self.length / self.segments))
-        return int(element)
+    def next_elements(self, size):
+        elements = np.random.zipf(self.alpha, size)
+        elements += (self.offset * (self.positions(size) // (self.length / self.segments))).astype(np.int64)
+        return elements
 
 
 class Zipf(MultiZipf):
@@ -84,32 +109,48 @@ class Uniform(Stream):
         np.random.seed(seed)
 
 
-    def next_element(self):
-        return np.random.randint(0, self.n_max)
+    def next_elements(self, size):
+        return np.random.randint(0, self.n_max, size, dtype=np.int64)
 
 
 class Unequal(Stream):
 
     def __init__(self, length, alpha, beta, seed=None, save=True):
         super().__init__(length, save)
-        data = np.zeros(length, dtype=int)
+        data = np.zeros(length, dtype=np.int64)
         for i in range(alpha):
             for j in range(beta):
                 data[i*beta + j] = i
         for i in range(alpha * beta, length):
             data[i] = i - alpha * (beta - 1)
         np.random.seed(seed)
-        self.data = iter(np.random.permutation(data))
+        self.data = np.random.permutation(data)
 
 
-    def next_element(self):
-        return next(self.data)
+    def next_elements(self, size):
+        return self.data[self.N:self.N + size]
 
 
 class File(Stream):
 
-    def __init__(self, file_path, length=math.inf, shuffle=False, repetitions=1, seed=None, save=True):
-        if shuffle or repetitions > 1:
+    def __init__(self, file_path, length=math.inf, shuffle=False, repetitions=1, seed=None, save=True, mmap=False):
+        self.mmap = mmap
+        if mmap:
+            # The file is never loaded. The stream is defined by the positions (lines) of the file to read
+            if os.path.getsize(file_path) > 0:
+                self.data = np.memmap(file_path, dtype=np.uint8, mode='r')
+                self.offsets = self.load_index(file_path)
+            else:  # An empty file can't be mapped
+                self.data = np.empty(0, dtype=np.uint8)
+                self.offsets = np.zeros(1, dtype=np.int64)
+            self.lines = len(self.offsets) - 1
+            length = min(self.lines * repetitions, length)
+            if shuffle:
+                np.random.seed(seed)
+                self.order = np.random.permutation(self.lines * repetitions)
+            else:
+                self.order = None
+        elif shuffle or repetitions > 1:
             self.data = []
             with open(file_path, 'r') as file:
                 for line in file:
@@ -117,6 +158,7 @@ class File(Stream):
                     self.data.append(element)
             self.data *= repetitions
             length = min(len(self.data), length)
+            self.data = np.array(self.data)
             if shuffle:
                 np.random.seed(seed)
                 self.data = np.random.permutation(self.data)
@@ -127,16 +169,76 @@ class File(Stream):
         super().__init__(length, save)
 
 
-    def next_element(self):
-        if isinstance(self.data, TextIOWrapper):
-            element = self.data.readline()[:-1]
-            if element == '':
-                raise StopIteration
-            return element
+    def load_index(self, file_path):
+        # Line i is the range [offsets[i], offsets[i + 1] - 1) of the file. The index is cached next to the file when
+        # its folder is writable, otherwise it's only kept in memory
+        index_path = file_path + '.index.npy'
+        if os.path.isfile(index_path) and os.path.getmtime(index_path) >= os.path.getmtime(file_path):
+            return np.load(index_path, mmap_mode='r')
+        block_size = 1 << 26
+        newlines = [np.flatnonzero(self.data[start:start + block_size] == ord('\n')) + start
+                    for start in range(0, len(self.data), block_size)]
+        offsets = np.concatenate([np.zeros(1, dtype=np.int64)] + [positions + 1 for positions in newlines])
+        if len(self.data) > 0 and self.data[-1] != ord('\n'):  # Last line without newline
+            offsets = np.append(offsets, len(self.data) + 1)
+        try:
+            np.save(index_path, offsets)
+        except OSError:
+            pass
+        return offsets
+
+
+    def read_lines(self, lines):
+        # Gathers the characters of the lines into a fixed width array, in blocks to bound the memory used. The
+        # elements are copied out of the mapping since the instances and the frequency oracle need them as an array
+        # of ids, but the file is only read through the page cache
+        elements = []
+        for block in range(0, len(lines), 1 << 16):
+            starts = self.offsets[lines[block:block + (1 << 16)]]
+            sizes = self.offsets[lines[block:block + (1 << 16)] + 1] - 1 - starts
+            width = max(int(sizes.max()), 1)
+            valid = np.arange(width) < sizes[:, None]
+            characters = np.where(valid, self.data[np.where(valid, starts[:, None] + np.arange(width), 0)], 0)
+            elements.append(characters.astype(np.uint8).view('S%d' % width).ravel().astype(str))
+        return np.concatenate(elements)
+
+
+    def next_elements(self, size):
+        if self.mmap:
+            positions = np.arange(self.N, self.N + size) if self.order is None else self.order[self.N:self.N + size]
+            return self.read_lines(positions % self.lines)
+        elif isinstance(self.data, TextIOWrapper):
+            return np.array([line[:-1] for line in itertools.islice(self.data, size)])
         else:
-            if self.N == len(self.data):
-                raise StopIteration
-            return self.data[self.N]
+            return self.data[self.N:self.N + size]
+
+
+class BinaryFile(Stream):
+
+    def __init__(self, file_path, length=math.inf, seed=None, save=True):
+        self.file = open(file_path, 'rb')
+        self.encoding, count = trace_format.read_header(self.file)
+        self.buffer = np.empty(0, dtype=np.uint8)  # Bytes read but not decoded yet
+        self.previous = 0
+        super().__init__(min(count, length), save)
+
+
+    def next_elements(self, size):
+        if self.encoding == trace_format.RAW:
+            return np.fromfile(self.file, dtype='<i8', count=size).astype(np.int64)
+        # The varints are read in large blocks until there are enough complete ones
+        while np.count_nonzero(self.buffer < 0x80) < size:
+            block = np.fromfile(self.file, dtype=np.uint8, count=1 << 22)
+            if len(block) == 0:
+                break
+            self.buffer = np.concatenate((self.buffer, block))
+        ends = np.flatnonzero(self.buffer < 0x80)
+        if len(ends) == 0:
+            return np.empty(0, dtype=np.int64)
+        end = ends[min(size, len(ends)) - 1] + 1
+        elements, self.previous = trace_format.decode_delta_varint(self.buffer[:end], self.previous)
+        self.buffer = self.buffer[end:]
+        return elements
 
 
 class ZipfNoiseZipf(Stream):
@@ -149,13 +251,15 @@ class ZipfNoiseZipf(Stream):
         np.random.seed(seed)
 
 
-    def next_element(self):
-        if self.N < self.length * (1 - self.noise) // 2:
-            return int(np.random.zipf(self.alpha))
-        elif self.N < self.length - self.length * (1 - self.noise) // 2:
-            return self.N
-        else:
-            return int(np.random.zipf(self.alpha) + self.offset)
+    def next_elements(self, size):
+        positions = self.positions(size)
+        elements = positions.copy()
+        head = positions < self.length * (1 - self.noise) // 2
+        tail = positions >= self.length - self.length * (1 - self.noise) // 2
+        # Drawing in stream order so the sequence doesn't depend on the block size
+        elements[head] = np.random.zipf(self.alpha, np.count_nonzero(head))
+        elements[tail] = np.random.zipf(self.alpha, np.count_nonzero(tail)) + self.offset
+        return elements
 
 
 
@@ -166,8 +270,6 @@ class ESA(Stream):
         np.random.seed(seed)
 
 
-    def next_element(self):
-        if self.N < self.length // 2:
-            return self.N // 2
-        else:
-            return self.length
\ No newline at end of file
+    def next_elements(self, size):
+        positions = self.positions(size)
+        return np.where(positions < self.length // 2, positions // 2, self.length)
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+import sys
+import struct
+import numpy as np
+
+
+# Binary trace format (see also src/utils/TraceReader.h). Little-endian header:
+# magic (8 bytes), version (uint32), encoding (uint32), number of elements (uint64).
+# It is followed by the elements, either as packed int64 (RAW) or as the zigzag encoded
+# differences between consecutive elements written as LEB128 varints (DELTA_VARINT).
+MAGIC = b'HHTRACE\0'
+VERSION = 1
+RAW = 0
+DELTA_VARINT = 1
+HEADER = struct.Struct('<8sIIQ')
+
+
+def read_header(file):
+    magic, version, encoding, count = HEADER.unpack(file.read(HEADER.size))
+    if magic != MAGIC or version != VERSION:
+        print("Unknown trace format")
+        exit(1)
+    return encoding, count
+
+
+def encode_delta_varint(elements, previous):
+    deltas = np.diff(elements.astype(np.int64), prepend=np.int64(previous)).view(np.uint64)
+    zigzag = (deltas << np.uint64(1)) ^ (deltas.view(np.int64) >> np.int64(63)).view(np.uint64)
+    sizes = np.ones(len(zigzag), dtype=np.int64)
+    for i in range(1, 10):
+        sizes += zigzag >= np.uint64(1) << np.uint64(7 * i)
+    offsets = np.cumsum(sizes) - sizes
+    output = np.empty(int(sizes.sum()), dtype=np.uint8)
+    for i in range(10):
+        selected = sizes > i
+        byte = (zigzag[selected] >> np.uint64(7 * i)) & np.uint64(0x7f)
+        byte |= np.where(sizes[selected] > i + 1, np.uint64(0x80), np.uint64(0))
+        output[offsets[selected] + i] = byte
+    return output
+
+
+def decode_delta_varint(data, previous):
+    # data must end at the end of a varint. Returns the elements and the last one of them
+    ends = np.flatnonzero(data < 0x80)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    shifts = (np.arange(len(data)) - np.repeat(starts, ends - starts + 1)) * 7
+    values = np.bitwise_or.reduceat((data & 0x7f).astype(np.uint64) << shifts.astype(np.uint64), starts)
+    deltas = (values >> np.uint64(1)) ^ (np.uint64(0) - (values & np.uint64(1)))
+    elements = (np.cumsum(deltas, dtype=np.uint64) + np.uint64(previous % 2**64)).view(np.int64)
+    return elements, int(elements[-1])
+
+
+def convert(text_path, trace_path, encoding=RAW, chunk_size=1 << 20):
+    # Converts a text trace (one id per line) to the binary format
+    from streams import File
+    stream = File(text_path, mmap=True, save=False)
+    previous = 0
+    with open(trace_path, 'wb') as trace:
+        trace.write(HEADER.pack(MAGIC, VERSION, encoding, 0))
+        count = 0
+        while True:
+            chunk = stream.next_block(chunk_size)
+            if len(chunk) == 0:
+                break
+            elements = chunk.astype(np.int64)
+            if encoding == RAW:
+                trace.write(elements.astype('<i8').tobytes())
+            else:
+                trace.write(encode_delta_varint(elements, previous).tobytes())
+                previous = int(elements[-1])
+            count += len(elements)
+        trace.seek(0)
+        trace.write(HEADER.pack(MAGIC, VERSION, encoding, count))
+
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: trace_format.py text_trace binary_trace [--delta]")
+        exit(1)
+    convert(sys.argv[1], sys.argv[2], DELTA_VARINT if "--delta" in sys.argv[3:] else RAW)
+
+if __name__ == '__main__':
+    main()